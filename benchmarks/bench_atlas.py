@@ -0,0 +1,47 @@
+# -*- encoding: utf-8 -*-
+
+"""Sprite loading from the PNGs, the per-icon sprite cache and the atlas.
+
+    python benchmarks/bench_atlas.py [ICONS]
+
+Every pass starts with empty in-process memos, like a fresh `pokedex show`.
+The atlas is built first when there is none.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pokedex.graphics import atlas, sprite_cache
+
+
+def main(count=200):
+    names = sorted(n for n in os.listdir(atlas.ICONS_DIR) if n.endswith(".png"))[:count]
+    paths = [os.path.join(atlas.ICONS_DIR, n) for n in names]
+    if not os.path.exists(atlas.atlas_path):
+        atlas.build_atlas()
+    for path in paths:
+        sprite_cache._write(path, os.stat(path), sprite_cache.quantize_sprite(path))
+
+    def decode(path):
+        return sprite_cache.quantize_sprite(path)
+
+    def cache(path):
+        return sprite_cache._read(path, os.stat(path))
+
+    def packed(path):
+        return atlas.atlas_sprite(path, os.stat(path))
+
+    for label, function in (("decode PNG", decode), ("sprite cache", cache), ("atlas", packed)):
+        atlas._atlas, atlas._opened = None, False
+        start = time.perf_counter()
+        for path in paths:
+            assert function(path) is not None
+        elapsed = time.perf_counter() - start
+        print("%-24s %8.3f ms/icon" % (label, elapsed / len(paths) * 1e3))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,95 @@
+# -*- encoding: utf-8 -*-
+
+"""Cells per second through layout and rendering of a full card.
+
+Compares the array-backed Buffer with the previous list-of-namedtuples one.
+
+    python benchmarks/bench_buffer.py [POKEMON] [ROUNDS]
+"""
+
+import os
+import sys
+import time
+import collections
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pokedex import formats
+from pokedex.graphics import cell_buffer
+from pokedex.graphics.colors import format_fg, format_bg, reset_code
+from pokedex.pokemon import Pokemon
+
+Cell = collections.namedtuple("Cell", "character fg bg")
+
+
+class ListBuffer(object):
+    # Previous implementation, kept here as the baseline
+    def __init__(self, width=80, height=16):
+        self.width = width
+        self.height = height
+        self.buffer = [[Cell(" ", 15, -1) for x in range(width)] for y in range(height)]
+
+    def put_cell(self, position, character, fg=15, bg=-1):
+        x, y = position
+        assert x >= 0
+        assert y >= 0
+        assert x < self.width
+        assert y < self.height
+
+        assert isinstance(character, str)
+        if len(character) == 0:
+            character = " "
+
+        self.buffer[y][x] = Cell(character, fg, bg)
+
+    def put_line(self, position, line, fg=15, bg=-1):
+        x, y = position
+        for i, char in enumerate(line):
+            self.put_cell((x+i, y), char, fg, bg)
+
+    def put_row(self, position, character, fg, bg):
+        x, y = position
+        for i in range(min(len(fg), self.width - x)):
+            self.put_cell((x + i, y), character, fg[i], bg[i])
+
+    def render(self):
+        output = []
+        for line in self.buffer:
+            result = ""
+            last_fg, last_bg = -1, -1
+
+            for cell in line:
+                if cell.fg != last_fg:
+                    result += format_fg(cell.fg)
+                    last_fg = cell.fg
+                if cell.bg != last_bg:
+                    result += format_bg(cell.bg)
+                    last_bg = cell.bg
+                result += cell.character
+            result += reset_code
+            output.append(result)
+
+        return output
+
+
+def measure(buffer_class, pokemon, rounds):
+    formats.Buffer = buffer_class
+    start = time.perf_counter()
+    for _ in range(rounds):
+        buffer = formats.render_card(pokemon)
+        buffer.render()
+    elapsed = time.perf_counter() - start
+    return buffer.width * buffer.height * rounds / elapsed, elapsed / rounds
+
+
+def main(pokemon="charizard", rounds=200):
+    pkmn = Pokemon(pokemon)
+    formats.render_card(pkmn)  # Warm the sprite cache
+    for label, buffer_class in (("list of Cell", ListBuffer), ("array planes", cell_buffer.Buffer)):
+        cells, per_card = measure(buffer_class, pkmn, rounds)
+        print("%-14s %12.0f cells/s %8.3f ms/card" % (label, cells, per_card * 1e3))
+    formats.Buffer = cell_buffer.Buffer
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2], *[int(a) for a in sys.argv[2:3]])
@@ -0,0 +1,47 @@
+# -*- encoding: utf-8 -*-
+
+"""Per-lookup latency of the compiled index against re-parsing pokedex.json.
+
+    python benchmarks/bench_index.py [LOOKUPS]
+"""
+
+import os
+import sys
+import json
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pokedex.database.index import CompiledIndex, compile_index, database_path, index_path
+
+
+def json_lookup(pokemon_id):
+    # Previous get_pokemon_data(): parse the whole file for every lookup
+    with open(database_path, "r") as f:
+        all_pokemon = json.load(f)
+    return all_pokemon.get(str(pokemon_id))
+
+
+def report(label, seconds, lookups):
+    print("%-24s %10.2f us/lookup" % (label, seconds / lookups * 1e6))
+
+
+def main(lookups=1000):
+    compile_index()
+    index = CompiledIndex(index_path)
+    with open(database_path, "r") as f:
+        names = [record["name"] for record in json.load(f).values()]
+
+    ids = [random.randint(1, len(names)) for _ in range(lookups)]
+    picked = [random.choice(names) for _ in range(lookups)]
+
+    json_lookups = max(lookups // 20, 10)
+    report("json.load per lookup", timeit.timeit(lambda: [json_lookup(i) for i in ids[:json_lookups]], number=1), json_lookups)
+    report("index by id", timeit.timeit(lambda: [index.get(i) for i in ids], number=1), lookups)
+    report("index by name", timeit.timeit(lambda: [index.lookup(n) for n in picked], number=1), lookups)
+    print("%-24s %10.2f ms" % ("compile", timeit.timeit(compile_index, number=1) * 1e3))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,43 @@
+# -*- encoding: utf-8 -*-
+
+"""Whole-image xterm-256 quantization against the per-pixel rgb2short path.
+
+    python benchmarks/bench_quantize.py [ICONS]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PIL import Image
+
+from pokedex import resource_path
+from pokedex.graphics.conversion import rgb2short, quantize_image
+
+
+def per_pixel(image):
+    # Previous draw_image(): hex-format every pixel and run rgb2short on it
+    pixels = image.load()
+    width, height = image.size
+    return [[int(rgb2short("%02x%02x%02x" % pixels[x, y])[0]) for x in range(width)]
+            for y in range(height)]
+
+
+def main(count=200):
+    icons_dir = os.path.join(resource_path, "icons")
+    names = sorted(n for n in os.listdir(icons_dir) if n.endswith(".png"))[:count]
+    images = [Image.open(os.path.join(icons_dir, n)).convert("RGB") for n in names]
+    pixels = sum(image.width * image.height for image in images)
+
+    for label, function in (("rgb2short per pixel", per_pixel), ("quantize_image", quantize_image)):
+        start = time.perf_counter()
+        for image in images:
+            function(image)
+        elapsed = time.perf_counter() - start
+        print("%-20s %8.2f ms/icon %12.0f pixels/s" % (label, elapsed / len(images) * 1e3, pixels / elapsed))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,81 @@
+# -*- encoding: utf-8 -*-
+
+"""Lookups per second of the veekun query layer against the old formatted SQL.
+
+    python benchmarks/bench_queries.py [LOOKUPS] [DATABASE]
+
+Skipped when the veekun database is not installed.
+"""
+
+import os
+import sys
+import random
+import sqlite3
+import timeit
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pokedex.database import queries
+
+
+def old_entry(cursor, id, language="en", version="x"):
+    # Previous get_pokedex_entry(): formatted SQL joining identifiers every call
+    cursor.execute("""SELECT p.species_id, name, genus, flavor_text, height, weight
+                        FROM pokemon p
+                        JOIN languages l ON l.identifier="{language}"
+                        JOIN versions v ON v.identifier="{version}"
+                        JOIN pokemon_species_names s ON s.local_language_id=l.id AND s.pokemon_species_id=p.species_id
+                        LEFT JOIN pokemon_species_flavor_text f ON f.language_id=l.id AND f.version_id=v.id AND f.species_id = p.species_id
+                       WHERE p.species_id={id}
+                   """.format(id=id, language=language, version=version))
+    return cursor.fetchall()
+
+
+def old_by_name(cursor, name, language="en"):
+    cursor.execute("""SELECT DISTINCT p.species_id
+                        FROM pokemon p
+                        JOIN languages l ON l.identifier="{language}"
+                        JOIN pokemon_species_names s ON s.local_language_id=l.id
+                        AND LOWER(s.name)="{name}"
+                        WHERE p.species_id=s.pokemon_species_id
+                   """.format(name=name.lower().strip(), language=language))
+    return cursor.fetchall()
+
+
+def report(label, seconds, lookups):
+    print("%-24s %10.0f lookups/s" % (label, lookups / seconds))
+
+
+def main(lookups=2000, database=None):
+    if database is not None:
+        queries.veekun_path = database
+    if not os.path.exists(queries.veekun_path) or os.path.getsize(queries.veekun_path) == 0:
+        print("Skipped: no veekun database at %s" % queries.veekun_path)
+        return
+
+    cursor = sqlite3.connect(queries.veekun_path).cursor()
+    count = cursor.execute("SELECT MAX(species_id) FROM pokemon").fetchone()[0]
+    ids = [random.randint(1, count) for _ in range(lookups)]
+    names = [queries.get_pokemon_name(i) for i in ids]
+
+    report("formatted entry", timeit.timeit(lambda: [old_entry(cursor, i) for i in ids], number=1), lookups)
+    report("formatted by name", timeit.timeit(lambda: [old_by_name(cursor, n) for n in names], number=1), lookups)
+    report("prepared entry", timeit.timeit(lambda: [queries.get_pokedex_entry(i) for i in ids], number=1), lookups)
+    report("prepared by name", timeit.timeit(lambda: [queries.get_pokemon_by_name(n) for n in names], number=1), lookups)
+
+    def worker():
+        for i in ids:
+            queries.get_pokedex_entry(i)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    seconds = timeit.default_timer()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report("prepared entry, 4 threads", timeit.default_timer() - seconds, lookups * len(threads))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000, *sys.argv[2:3])
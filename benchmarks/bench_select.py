@@ -0,0 +1,55 @@
+# -*- encoding: utf-8 -*-
+
+"""Filtering the dex with the columnar table against a scan of the records.
+
+    python benchmarks/bench_select.py [REPEAT]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pokedex.database.store import load_records
+from pokedex.database.table import get_table
+from pokedex.database.type_chart import weaknesses
+
+QUERIES = [
+    ("water, >100 kg, weak to electric", dict(types=["water"], weight=(1001, None), weak_to=["electric"])),
+    ("fire/flying", dict(types=["fire", "flying"])),
+    ("1..151 by weight", dict(number=(1, 151), order="-weight")),
+    ("taller than 2 m", dict(height=(21, None), order="height")),
+]
+
+
+def scan(records, types=(), weak_to=(), number=None, height=None, weight=None, order="number"):
+    # One pass over the record dicts, as a plain Python filter would do it
+    def within(value, bounds):
+        return bounds is None or ((bounds[0] is None or value >= bounds[0]) and (bounds[1] is None or value <= bounds[1]))
+
+    found = [n for n in sorted(records)
+             if set(types) <= set(records[n]["types"]) and set(weak_to) <= set(weaknesses(records[n]["types"]))
+             and within(n, number) and within(records[n]["height"], height) and within(records[n]["weight"], weight)]
+    column = order.lstrip("-")
+    if column != "number":
+        found.sort(key=lambda n: records[n][column], reverse=order.startswith("-"))
+    return found
+
+
+def main(repeat=200):
+    records = load_records()
+    table = get_table()
+    for label, query in QUERIES:
+        assert table.select(**query) == scan(records, **query), label
+        timings = []
+        for function in (lambda: scan(records, **query), lambda: table.select(**query)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                function()
+            timings.append((time.perf_counter() - start) / repeat * 1e6)
+        print("%-34s scan %9.1f us   table %7.1f us" % (label, timings[0], timings[1]))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,111 @@
+# -*- encoding: utf-8 -*-
+
+"""Load test of the HTTP API: requests per second and latency percentiles.
+
+    python benchmarks/bench_serve.py [URL] [--connections N] [--duration SECONDS]
+
+Without a URL a local `pokedex serve` is started on a free port. Every
+connection is kept alive and sends one request at a time, cycling through
+record, name, type and search paths.
+"""
+
+import os
+import sys
+import time
+import random
+import socket
+import asyncio
+import argparse
+import subprocess
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+PATHS = (["/pokemon/%d" % random.randint(1, 1025) for _ in range(200)]
+         + ["/pokemon/pikachu", "/pokemon/charizard", "/pokemon/mr-mime"]
+         + ["/types/fire/weaknesses", "/types/water,ground/weaknesses"]
+         + ["/search?q=char", "/search?q=eev", "/search?q=garchomb"])
+
+
+async def read_response(reader):
+    length = 0
+    status = await reader.readline()
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":")[1])
+    await reader.readexactly(length)
+    return int(status.split()[1])
+
+
+async def client(host, port, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    paths = PATHS[:]
+    random.shuffle(paths)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        start = time.perf_counter()
+        writer.write(("GET %s HTTP/1.1\r\nHost: %s\r\n\r\n" % (path, host)).encode("ascii"))
+        status = await read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        if status != 200:
+            errors.append(path)
+    writer.close()
+
+
+async def load(host, port, connections, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, deadline, latencies, errors) for _ in range(connections)])
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def start_server():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([sys.executable, "-m", "pokedex.main", "serve", "--port", str(port)],
+                               cwd=ROOT, stderr=subprocess.PIPE, universal_newlines=True)
+    process.stderr.readline()  # "Serving on ..." once the records are loaded
+    return process, "http://127.0.0.1:%d" % port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server()
+    try:
+        address = urlsplit(url)
+        seconds, latencies, errors = asyncio.run(load(address.hostname, address.port or 80,
+                                                      args.connections, args.duration))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    print("%-24s %10d" % ("requests", len(latencies)))
+    print("%-24s %10.0f" % ("requests/s", len(latencies) / seconds))
+    for label, fraction in (("p50", 0.5), ("p99", 0.99)):
+        print("%-24s %10.3f ms" % ("latency " + label, percentile(latencies, fraction) * 1e3))
+    print("%-24s %10d" % ("non-200 responses", len(errors)))
+
+
+if __name__ == "__main__":
+    main()
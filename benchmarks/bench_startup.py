@@ -0,0 +1,67 @@
+# -*- encoding: utf-8 -*-
+
+"""Startup cost of the CLI, failing when it goes over budget.
+
+    python benchmarks/bench_startup.py [BUDGET_MS]
+
+Runs `pokedex --help` under -X importtime, prints the slowest imports,
+and exits with status 1 when the best wall time exceeds the budget or a
+heavy dependency is imported that --help does not need.
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Only the code paths that use them may import these
+LAZY_MODULES = ["PIL", "requests", "urllib3", "progressbar", "sqlite3", "concurrent.futures"]
+RUNS = 5
+
+
+def run(*options):
+    command = [sys.executable] + list(options) + ["-m", "pokedex.main", "--help"]
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    return time.perf_counter() - start, result.stderr
+
+
+def parse_importtime(output):
+    """(module, cumulative us) for every top-level import"""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(cumulative)))
+    return imports
+
+
+def main(budget=100.0):
+    seconds = min(run()[0] for _ in range(RUNS))
+    _, output = run("-X", "importtime")
+    imports = parse_importtime(output)
+
+    print("%-40s %10s" % ("slowest imports", "ms"))
+    for name, cumulative in sorted(imports, key=lambda item: -item[1])[:10]:
+        print("%-40s %10.2f" % (name, cumulative / 1e3))
+
+    imported = {name for name, _ in imports}
+    eager = [name for name in LAZY_MODULES if name in imported]
+    print("%-40s %10.2f (budget %.0f)" % ("pokedex --help wall time", seconds * 1e3, budget))
+
+    failed = False
+    if eager:
+        print("Imported eagerly: %s" % ", ".join(eager))
+        failed = True
+    if seconds * 1e3 > budget:
+        print("Over budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else 100.0))
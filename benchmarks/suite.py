@@ -0,0 +1,214 @@
+# -*- encoding: utf-8 -*-
+
+"""Benchmark suite of the lookup, render and sync hot paths.
+
+    python benchmarks/suite.py [NAME...] [--output FILE] [--baseline FILE]
+                               [--save-baseline] [--threshold FRACTION]
+
+Every benchmark reports the best of REPEAT runs as seconds per operation.
+Results are written as JSON (benchmarks/results.json by default) and
+compared against the baseline (benchmarks/baseline.json): a benchmark more
+than --threshold slower than its baseline is a regression, and the exit
+status is 1. --save-baseline stores the results as the new baseline.
+
+The network is never used: lookups only read the local data and
+download_database() syncs from pokedex/mock_server.py.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from contextlib import redirect_stdout, redirect_stderr
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCHMARKS_DIR, "..")
+sys.path.insert(0, ROOT)
+
+REPEAT = 5
+RESULTS_PATH = os.path.join(BENCHMARKS_DIR, "results.json")
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, "baseline.json")
+THRESHOLD = 0.25
+
+COLD_LOOKUP = """
+import time
+start = time.perf_counter()
+from pokedex.pokemon import Pokemon
+Pokemon("pikachu")
+print(time.perf_counter() - start)
+"""
+
+
+def best(function, number, repeat=REPEAT):
+    """Seconds per call of function, best of repeat rounds of number calls"""
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        rounds.append((time.perf_counter() - start) / number)
+    return min(rounds)
+
+
+def lookup_cold():
+    """Fresh interpreter importing pokedex.pokemon and building one Pokemon"""
+    def run():
+        output = subprocess.check_output([sys.executable, "-c", COLD_LOOKUP], cwd=ROOT)
+        return float(output.decode("ascii").split()[-1])
+    return min(run() for _ in range(REPEAT)), "lookup"
+
+
+def lookup_warm():
+    from pokedex.pokemon import Pokemon
+
+    numbers = [str(n) for n in random.Random(0).sample(range(1, 1026), 100)]
+    for number in numbers:
+        Pokemon(number)
+    queue = iter(numbers * 100)
+    return best(lambda: Pokemon(next(queue)), 100), "lookup"
+
+
+def card_render():
+    """formats.card for one Pokémon, output discarded"""
+    from pokedex import formats
+    from pokedex.pokemon import Pokemon
+
+    pokemon = Pokemon("6")
+    sink = io.StringIO()
+
+    def run():
+        with redirect_stdout(sink):
+            formats.card(pokemon)
+        sink.seek(0)
+        sink.truncate()
+    return best(run, 50), "card"
+
+
+def draw_all_icons():
+    """draw_image on every icon with cold per-process sprite memos"""
+    from pokedex import resource_path
+    from pokedex.graphics import atlas, sprite_cache
+    from pokedex.graphics.cell_buffer import Buffer
+    from pokedex.graphics.draw import draw_image
+
+    icons_dir = os.path.join(resource_path, "icons")
+    paths = [os.path.join(icons_dir, name) for name in sorted(os.listdir(icons_dir)) if name.endswith(".png")]
+    buffer = Buffer(40, 20)
+
+    def run():
+        sprite_cache._loaded.clear()
+        if atlas._atlas is not None:
+            atlas._atlas.sprites.clear()
+        for path in paths:
+            draw_image(buffer, path)
+    run()  # Fill the on-disk sprite cache
+    return best(run, 1) / len(paths), "icon"
+
+
+def buffer_render():
+    from pokedex import formats
+    from pokedex.pokemon import Pokemon
+
+    buffer = formats.render_card(Pokemon("6"))
+    return best(buffer.render, 200), "render"
+
+
+def rgb2short():
+    from pokedex.graphics.conversion import rgb2short
+
+    colors = ["%06x" % c for c in random.Random(0).sample(range(1 << 24), 1000)]
+
+    def run():
+        for color in colors:
+            rgb2short(color)
+    return best(run, 5) / len(colors), "color"
+
+
+def download_database():
+    """Sync 151 Pokémon from the mock PokeAPI into a scratch directory"""
+    from pokedex import mock_server
+    from pokedex.database import cache, get
+
+    server = mock_server.start(seed=0)
+    scratch = tempfile.mkdtemp(prefix="pokedex-bench-")
+    previous = cache.default_cache
+    try:
+        def run():
+            # A new directory every round: no database, checkpoint or HTTP cache yet
+            directory = tempfile.mkdtemp(dir=scratch)
+            cache.configure(os.path.join(directory, "http"))
+            with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):  # Progress bar
+                get.download_database(server.base_url, count=151, db_path=os.path.join(directory, "pokedex.json"),
+                                      icons_dir=os.path.join(directory, "icons"), sprites=False)
+            assert os.path.exists(os.path.join(directory, "pokedex.json"))
+        return best(run, 1, repeat=3), "sync"
+    finally:
+        cache.default_cache = previous
+        server.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+BENCHMARKS = [lookup_cold, lookup_warm, card_render, draw_all_icons, buffer_render, rgb2short, download_database]
+
+
+def compare(results, baseline, threshold):
+    """Names of the benchmarks slower than baseline by more than threshold"""
+    return [name for name, result in results.items()
+            if name in baseline and result["seconds"] > baseline[name]["seconds"] * (1 + threshold)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", metavar="NAME", help="Only run these benchmarks.")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    known = {function.__name__: function for function in BENCHMARKS}
+    unknown = [name for name in args.names if name not in known]
+    if unknown:
+        parser.error("unknown benchmark %s (expected %s)" % (", ".join(unknown), ", ".join(known)))
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        baseline = {}
+
+    results = {}
+    for name in args.names or list(known):
+        seconds, unit = known[name]()
+        results[name] = {"seconds": seconds, "unit": unit}
+        line = "%-24s %12.3f us/%s" % (name, seconds * 1e6, unit)
+        if name in baseline:
+            line += "  %+6.1f%%" % ((seconds / baseline[name]["seconds"] - 1) * 100)
+        print(line)
+        sys.stdout.flush()
+
+    document = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                "platform": platform.platform(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(document, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(document, f, indent=2)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("Regressions (more than %d%% slower than the baseline): %s"
+              % (args.threshold * 100, ", ".join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
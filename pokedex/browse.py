@@ -0,0 +1,144 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import sys
+import shutil
+
+from .formats import render_card
+from .graphics.cell_buffer import Buffer
+from .database.search import get_index, suggest
+from .database.store import find_record, load_records
+from .exceptions import NoSuchPokemon
+
+KEYS = {
+    "\x1b[C": "next",
+    "\x1b[D": "previous",
+    "\x1b[A": "back",
+    "\x1b[B": "forward",
+    "l": "next",
+    "h": "previous",
+    "k": "back",
+    "j": "forward",
+    "/": "search",
+    "q": "quit",
+    "\x03": "quit",
+}
+
+help_line = u"←/→ previous/next  ↑/↓ 10 back/forward  / search  q quit"
+
+
+class Browser(object):
+    """Interactive card browser redrawing only the cells that change"""
+
+    def __init__(self, number=1, shiny=False, out=None):
+        from .pokemon import Pokemon
+
+        self.Pokemon = Pokemon
+        self.numbers = sorted(load_records())
+        self.position = self.numbers.index(number) if number in self.numbers else 0
+        self.shiny = shiny
+        self.out = out or sys.stdout
+        self.query = None
+        self.message = ""
+        self.frame = None
+
+    def build_frame(self):
+        columns, rows = shutil.get_terminal_size((80, 30))
+        frame = Buffer(columns, rows)
+        pokemon = self.Pokemon(self.numbers[self.position])
+        frame.blit(render_card(pokemon, shiny=self.shiny), (0, 0))
+
+        if self.query is not None:
+            status = u"Search: %s" % self.query
+        else:
+            status = self.message or help_line
+        frame.put_line((0, rows - 1), status[:columns - 1], fg=245)
+        return frame
+
+    def redraw(self):
+        frame = self.build_frame()
+        self.out.write(frame.render_diff(self.frame))
+        self.out.flush()
+        self.frame = frame
+
+    def step(self, offset):
+        self.position = max(0, min(len(self.numbers) - 1, self.position + offset))
+
+    def search(self, query):
+        record = find_record(query)
+        if record is None:
+            number = get_index().exact(query)
+            record = find_record(number) if number else None
+        if record is None or record["id"] not in self.numbers:
+            self.message = str(NoSuchPokemon(query, suggest(query)))
+            return
+        self.position = self.numbers.index(record["id"])
+
+    def handle(self, key):
+        """Process one key press, returns False to quit"""
+        self.message = ""
+        if self.query is not None:
+            if key in ("\r", "\n"):
+                query, self.query = self.query, None
+                if query:
+                    self.search(query)
+            elif key == "\x1b":
+                self.query = None
+            elif key in ("\x7f", "\x08"):
+                self.query = self.query[:-1]
+            elif key.isprintable():
+                self.query += key
+            return True
+
+        action = KEYS.get(key)
+        if action == "quit":
+            return False
+        elif action == "next":
+            self.step(1)
+        elif action == "previous":
+            self.step(-1)
+        elif action == "forward":
+            self.step(10)
+        elif action == "back":
+            self.step(-10)
+        elif action == "search":
+            self.query = ""
+        return True
+
+
+def read_keys(fd):
+    """Yield key presses, keeping escape sequences together"""
+    while True:
+        data = os.read(fd, 32).decode("utf-8", "ignore")
+        if not data:
+            return
+        while data:
+            if data.startswith("\x1b[") and len(data) >= 3:
+                key, data = data[:3], data[3:]
+            else:
+                key, data = data[0], data[1:]
+            yield key
+
+
+def browse(pokemon=None, shiny=False):
+    import termios
+    import tty
+
+    record = find_record(pokemon) if pokemon is not None else None
+    browser = Browser(record["id"] if record else 1, shiny=shiny)
+
+    fd = sys.stdin.fileno()
+    settings = termios.tcgetattr(fd)
+    # Alternate screen, hidden cursor
+    sys.stdout.write("\033[?1049h\033[?25l")
+    try:
+        tty.setraw(fd)
+        browser.redraw()
+        for key in read_keys(fd):
+            if not browser.handle(key):
+                break
+            browser.redraw()
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, settings)
+        sys.stdout.write("\033[0m\033[?25h\033[?1049l")
+        sys.stdout.flush()
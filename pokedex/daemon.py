@@ -0,0 +1,198 @@
+# -*- encoding: utf-8 -*-
+
+"""Long-running lookup server on a Unix domain socket.
+
+The protocol is one JSON request line, for example
+
+    {"pokemon": ["25"], "format": "line"}
+
+answered by one JSON status line ({"ok": true} or {"ok": false, "error":
+...}) followed by the rendered output until the connection closes. Other
+request keys are shiny, mega, language, version and truecolor, or
+{"command": "stop"} to shut the server down.
+"""
+
+import os
+import io
+import sys
+import json
+import stat
+import socket
+
+CONNECT_TIMEOUT = 0.2
+CLIENT_TIMEOUT = 5  # A stuck client must not block the others
+
+
+def socket_path():
+    """POKEDEX_SOCKET, or a per-user socket in the runtime directory.
+
+    Setting POKEDEX_SOCKET to an empty string disables the daemon.
+    """
+    path = os.environ.get("POKEDEX_SOCKET")
+    if path is not None:
+        return path or None
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "pokedex.sock")
+    return os.path.join("/tmp", "pokedex-%d.sock" % os.getuid())
+
+
+def _own_socket(path):
+    """Whether path is a socket owned by this user, and not a file or another user's socket"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def _connect(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    client.settimeout(None)
+    return client
+
+
+def forward(request, out=None):
+    """Send a request to a running daemon and copy its answer to out.
+
+    Returns None when no daemon is listening, so the caller can run the
+    lookup itself, otherwise True or False for success.
+    """
+    path = socket_path()
+    # In a shared directory like /tmp anyone could have created the path first
+    if not path or not _own_socket(path):
+        return None
+    client = _connect(path)
+    if client is None:
+        return None
+
+    out = out or sys.stdout.buffer
+    with client, client.makefile("rb") as answer:
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        status = answer.readline()
+        if not status:
+            return None  # Daemon went away, answer locally
+        status = json.loads(status)
+        if not status["ok"]:
+            print(status["error"], file=sys.stderr)
+            return False
+        while True:
+            chunk = answer.read1(65536)
+            if not chunk:
+                break
+            out.write(chunk)
+    out.flush()
+    return True
+
+
+def render(request):
+    """Run a show request, returning its output"""
+    from contextlib import redirect_stdout
+    from .graphics.colors import truecolor_enabled, use_truecolor
+    from .main import show_pokemon
+
+    output = io.StringIO()
+    detected = truecolor_enabled()
+    try:
+        use_truecolor(request.get("truecolor", detected))
+        with redirect_stdout(output):
+            show_pokemon(request["pokemon"],
+                         shiny=request.get("shiny", False),
+                         mega=request.get("mega", False),
+                         language=request.get("language", "en"),
+                         version=request.get("version", "x"),
+                         format=request.get("format", "card"))
+    finally:
+        use_truecolor(detected)
+    return output.getvalue()
+
+
+def warm_up():
+    """Load everything a lookup needs, once"""
+    from .database.get import download_database
+    from .database.index import open_index
+    from .database.search import get_index
+    from .database.store import load_records
+    from .database import type_chart
+
+    download_database()
+    load_records()
+    open_index()
+    get_index()
+    type_chart.weaknesses(["normal"])
+    render({"pokemon": ["1"], "format": "card"})
+
+
+def serve(path=None):
+    """Answer requests until stopped, one at a time"""
+    path = path or socket_path()
+    if _connect(path) is not None:
+        raise RuntimeError("A daemon is already listening on %s" % path)
+    if os.path.lexists(path):
+        if not _own_socket(path):
+            raise RuntimeError("%s exists and is not a socket of this user, not replacing it" % path)
+        os.remove(path)  # Stale socket of a daemon that died
+
+    warm_up()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)  # Socket readable by its owner only
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    print("Listening on %s" % path, file=sys.stderr)
+
+    try:
+        running = True
+        while running:
+            client, _ = server.accept()
+            client.settimeout(CLIENT_TIMEOUT)
+            with client:
+                running = _handle(client)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(path)
+
+
+def _handle(client):
+    """Answer one connection, returns False once asked to stop"""
+    try:
+        with client.makefile("rb") as stream:
+            line = stream.readline()
+        request = json.loads(line)
+        if request.get("command") == "stop":
+            client.sendall(b'{"ok": true}\n')
+            return False
+        output = render(request)
+    except Exception as e:
+        try:
+            client.sendall(json.dumps({"ok": False, "error": "%s: %s" % (type(e).__name__, e)}).encode("utf-8") + b"\n")
+        except OSError:
+            pass  # Client hung up, or timed out before sending a request
+        return True
+    try:
+        client.sendall(b'{"ok": true}\n' + output.encode("utf-8"))
+    except OSError:
+        pass  # Client hung up
+    return True
+
+
+def stop(path=None):
+    """Ask a running daemon to exit, returns False if none was running"""
+    client = _connect(path or socket_path() or "")
+    if client is None:
+        return False
+    with client:
+        client.sendall(b'{"command": "stop"}\n')
+        client.recv(64)
+    return True
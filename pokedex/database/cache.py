@@ -0,0 +1,183 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+
+from .. import resource_path
+
+CACHE_DIR = os.path.join(resource_path, "cache", "http")
+CACHE_TTL = int(os.environ.get("POKEDEX_CACHE_TTL", 7 * 24 * 3600))
+CACHE_MAX_BYTES = int(os.environ.get("POKEDEX_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+REQUEST_TIMEOUT = 10
+
+
+class CachedResponse(object):
+    """The subset of requests.Response used by the callers, served from disk"""
+
+    def __init__(self, url, status_code, content, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HttpCache(object):
+    """On-disk cache of GET responses keyed by URL.
+
+    Each entry is one file: a JSON metadata line (url, validators, store
+    time) followed by the body. Entries younger than the TTL are served
+    without touching the network; older ones are revalidated with
+    If-None-Match/If-Modified-Since. File mtimes record the last access
+    and the least recently used entries are evicted above max_bytes.
+    """
+
+    def __init__(self, directory=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None
+
+    def _path(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _read(self, path):
+        try:
+            with open(path, "rb") as f:
+                meta = json.loads(f.readline())
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def _write(self, path, meta, content):
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode("utf-8") + b"\n")
+            f.write(content)
+        os.replace(tmp_path, path)
+        self._account(os.path.getsize(path) - old_size)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat
+
+    def _account(self, delta):
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = sum(stat.st_size for _, stat in self._entries())
+            else:
+                self.total_bytes += delta
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Least recently accessed first
+        entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+        self.total_bytes = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.total_bytes -= stat.st_size
+            except OSError:
+                pass
+
+    def get(self, url, session=None, timeout=REQUEST_TIMEOUT):
+        path = self._path(url)
+        meta, content = self._read(path)
+
+        if meta is not None and time.time() - meta["stored"] < self.ttl:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return CachedResponse(url, meta["status"], content, True)
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        import requests  # Only once the network is actually needed
+
+        try:
+            response = (session or requests).get(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            if meta is None:
+                raise
+            # Offline: a stale answer beats no answer
+            logging.info(f"Serving stale cache entry for {url}")
+            return CachedResponse(url, meta["status"], content, True)
+
+        if response.status_code == 304 and meta is not None:
+            meta["stored"] = time.time()
+            self._write(path, meta, content)
+            return CachedResponse(url, meta["status"], content, True)
+
+        if response.status_code == 200:
+            meta = {
+                "url": url,
+                "status": response.status_code,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "stored": time.time(),
+            }
+            self._write(path, meta, response.content)
+
+        return CachedResponse(url, response.status_code, response.content, False)
+
+    def clear(self):
+        with self.lock:
+            for path, _ in list(self._entries()):
+                os.remove(path)
+            self.total_bytes = 0
+
+
+default_cache = HttpCache()
+
+
+def configure(directory=None, ttl=None, max_bytes=None):
+    """Replace the shared cache, keeping any setting that is not given"""
+    global default_cache
+    default_cache = HttpCache(directory or default_cache.directory,
+                              default_cache.ttl if ttl is None else ttl,
+                              default_cache.max_bytes if max_bytes is None else max_bytes)
+    return default_cache
+
+
+def cached_get(url, session=None, timeout=REQUEST_TIMEOUT):
+    """GET a URL through the shared on-disk cache"""
+    return default_cache.get(url, session=session, timeout=timeout)
@@ -0,0 +1,145 @@
+# -*- encoding: utf-8 -*-
+
+from array import array
+
+from . import store
+from .index import open_index, _chain_id
+
+
+class EvolutionGraph(object):
+    """Evolution families of every species as flat adjacency arrays.
+
+    parents[n] is the species n evolves from (0 for a base stage), the
+    children of n are children_flat[child_start[n]:child_start[n + 1]] and
+    the members of chain c, in evolution order, are
+    members[chain_start[c]:chain_start[c + 1]]. All are indexed by dex
+    number or chain id, so finding a family takes no search.
+
+    resolved[n] is 0 when a member of n's family was saved without
+    evolves_from: the family's members are known but not who evolves into
+    whom, so its species get no parents and report their stages as None.
+    """
+
+    def __init__(self, records):
+        size = max(records) + 1 if records else 1
+        self.names = [""] * size
+        self.chain_ids = array("l", [0]) * size
+        self.parents = array("l", [0]) * size
+        self.resolved = bytearray(size)
+
+        families = {}
+        for number in sorted(records):
+            record = records[number]
+            self.names[number] = record["name"].capitalize()
+            chain = _chain_id(record["evolution_chain"])
+            self.chain_ids[number] = chain
+            if chain:
+                families.setdefault(chain, []).append(number)
+            else:
+                self.resolved[number] = "evolves_from" in record
+
+        for chain, family in families.items():
+            if any("evolves_from" not in records[number] for number in family):
+                continue  # Unknown until synced, see get.backfill_evolutions
+            for number in family:
+                parent = records[number]["evolves_from"]
+                if parent is not None and 0 < parent < size and self.chain_ids[parent] == chain:
+                    self.parents[number] = parent
+                self.resolved[number] = 1
+
+        counts = [0] * (size + 1)
+        for number in range(size):
+            if self.parents[number]:
+                counts[self.parents[number] + 1] += 1
+        self.child_start = array("l", [0]) * (size + 1)
+        for number in range(size):
+            self.child_start[number + 1] = self.child_start[number] + counts[number + 1]
+        self.children_flat = array("l", [0]) * self.child_start[size]
+        filled = array("l", self.child_start)
+        for number in range(size):
+            parent = self.parents[number]
+            if parent:
+                self.children_flat[filled[parent]] = number
+                filled[parent] += 1
+
+        chains = max(families) + 1 if families else 1
+        self.chain_start = array("l", [0]) * (chains + 1)
+        self.members = array("l")
+        for chain in range(chains):
+            self.chain_start[chain] = len(self.members)
+            for root in families.get(chain, ()):
+                if not self.parents[root]:
+                    self.members.append(root)
+                    self.members.extend(self.descendants(root) or ())
+        self.chain_start[chains] = len(self.members)
+
+    def children(self, number):
+        return self.children_flat[self.child_start[number]:self.child_start[number + 1]].tolist()
+
+    def parent(self, number):
+        return self.parents[number] or None
+
+    def family(self, number):
+        """Every member of the species' evolution chain, in evolution order
+        (dex order when unresolved)"""
+        chain = self.chain_ids[number] if number < len(self.chain_ids) else 0
+        if not chain:
+            return [number]
+        return self.members[self.chain_start[chain]:self.chain_start[chain + 1]].tolist()
+
+    def ancestors(self, number):
+        """Earlier stages, base stage first, or None when unresolved"""
+        if not self.resolved[number]:
+            return None
+        found = []
+        parent = self.parents[number]
+        while parent:
+            found.append(parent)
+            parent = self.parents[parent]
+        found.reverse()
+        return found
+
+    def descendants(self, number):
+        """Later stages, depth first, or None when unresolved"""
+        if not self.resolved[number]:
+            return None
+        found = []
+        stack = self.children(number)[::-1]
+        while stack:
+            child = stack.pop()
+            found.append(child)
+            stack.extend(self.children(child)[::-1])
+        return found
+
+    def tree(self, number):
+        """The species' whole family as nested {(id, Name): {...}} dicts,
+        only the species itself when unresolved"""
+        if not self.resolved[number]:
+            return {(number, self.names[number]): {}}
+
+        def subtree(n):
+            return {(c, self.names[c]): subtree(c) for c in self.children(n)}
+
+        roots = [n for n in self.family(number) if not self.parents[n]]
+        return {(n, self.names[n]): subtree(n) for n in roots}
+
+
+_graph = None
+_generation = None
+
+
+def get_graph():
+    """The graph of the local database, rebuilt when its records change.
+
+    Until pokedex.json is loaded the graph is built from the memory-mapped
+    index, so streaming exports never parse the whole file.
+    """
+    global _graph, _generation
+    if _graph is None or _generation != store.generation:
+        index = open_index() if store._records is None else None
+        if index is not None:
+            _graph = EvolutionGraph(index.evolution_records())
+        else:
+            _graph = EvolutionGraph(store.load_records())
+        _generation = store.generation
+    return _graph
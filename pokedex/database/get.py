@@ -1,126 +1,231 @@
 # -*- encoding: utf-8 -*-
 
 import os
-import requests
-import zlib
+import time
 import json
-from progressbar import ProgressBar
+import tempfile
+import threading
 
 from .. import resource_path
+from .store import build_record, chain_parents, POKEAPI_BASE_URL
+from .index import _chain_id
+from .cache import cached_get
+from . import type_chart
+
+POKEMON_COUNT = 1025  # Up to Gen 9
+
+DOWNLOAD_WORKERS = 16
+DOWNLOAD_RETRIES = 5
+DOWNLOAD_BACKOFF = 0.5
+REQUEST_TIMEOUT = 10
+
+_local = threading.local()
+
+
+def _session(workers=DOWNLOAD_WORKERS, retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF):
+    """Per-thread session with a pooled, retrying adapter"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(total=retries, backoff_factor=backoff,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers, max_retries=retry)
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _local.session = session
+    return session
+
+
+def download_pokemon(pokemon_id, base_url=POKEAPI_BASE_URL):
+    """Download the record of a single Pokémon, returns None on 404"""
+    session = _session()
+    response = cached_get(f"{base_url}/pokemon/{pokemon_id}", session=session)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    pokemon_data = response.json()
+
+    # Get species data for additional info
+    species_response = cached_get(f"{base_url}/pokemon-species/{pokemon_id}", session=session)
+    species_data = species_response.json() if species_response.status_code == 200 else {}
+
+    return build_record(pokemon_data, species_data)
+
+
+def download_chain(chain, base_url=POKEAPI_BASE_URL):
+    """Parents by dex number of an evolution chain, None when it cannot be fetched"""
+    try:
+        response = cached_get(f"{base_url}/evolution-chain/{chain}/", session=_session())
+        if response.status_code != 200:
+            return None
+        return chain_parents(response.json())
+    except Exception:
+        return None
+
+
+def _write_database(records, db_path):
+    """Atomically write records to db_path, as store.save_records does"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(db_path)),
+                                    prefix=".pokedex-", suffix=".json")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump({str(k): records[k] for k in sorted(records)}, f)
+        os.replace(tmp_path, db_path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def backfill_evolutions(base_url=POKEAPI_BASE_URL, workers=DOWNLOAD_WORKERS, db_path=None):
+    """Fill in evolves_from of the records saved without it.
+
+    One evolution-chain document resolves a whole family. Returns the ids of
+    the chains that could not be fetched, their families stay unresolved.
+    """
+    db_path = db_path or os.path.join(resource_path, "pokedex.json")
+    with open(db_path, 'r') as f:
+        records = {int(k): v for k, v in json.load(f).items()}
+
+    families = {}
+    for number, record in records.items():
+        chain = _chain_id(record["evolution_chain"])
+        if chain:
+            families.setdefault(chain, []).append(number)
+    pending = sorted(chain for chain, family in families.items()
+                     if any("evolves_from" not in records[number] for number in family))
+    if not pending:
+        return []
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    print(f"Downloading {len(pending)} evolution chains...")
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for chain, parents in zip(pending, executor.map(lambda chain: download_chain(chain, base_url), pending)):
+            if parents is None or not all(number in parents for number in families[chain]):
+                failed.append(chain)
+                continue
+            for number in families[chain]:
+                records[number]["evolves_from"] = parents[number]
+
+    if len(failed) < len(pending):
+        _write_database(records, db_path)
+    return failed
+
+
+def _load_checkpoint(checkpoint_path):
+    """Read the records completed by a previous, interrupted download"""
+    records = {}
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Torn last line from a crash
+                records[record["id"]] = record
+    return records
+
+
+def download_database(base_url=POKEAPI_BASE_URL, count=POKEMON_COUNT, workers=DOWNLOAD_WORKERS,
+                      db_path=None, icons_dir=None, sprites=True):
+    """Download or update Pokemon data from PokeAPI
+
+    Pokémon are fetched concurrently and every finished record is appended
+    to a checkpoint file next to the database, so an interrupted download
+    resumes where it stopped instead of starting over. Missing icons are
+    then fetched and normalized by the sprite pipeline (see sprites.py).
+    """
+    db_path = db_path or os.path.join(resource_path, "pokedex.json")
+    icons_dir = icons_dir or os.path.join(resource_path, "icons")
+    checkpoint_path = db_path + ".partial"
 
-# Daftar kelemahan berdasarkan tipe Pokémon
-POKEMON_WEAKNESS = {
-    "normal": ["fighting"],
-    "fire": ["water", "ground", "rock"],
-    "water": ["electric", "grass"],
-    "electric": ["ground"],
-    "grass": ["fire", "ice", "poison", "flying", "bug"],
-    "ice": ["fire", "fighting", "rock", "steel"],
-    "fighting": ["flying", "psychic", "fairy"],
-    "poison": ["ground", "psychic"],
-    "ground": ["water", "ice", "grass"],
-    "flying": ["electric", "ice", "rock"],
-    "psychic": ["bug", "ghost", "dark"],
-    "bug": ["fire", "flying", "rock"],
-    "rock": ["water", "grass", "fighting", "ground", "steel"],
-    "ghost": ["ghost", "dark"],
-    "dragon": ["ice", "dragon", "fairy"],
-    "dark": ["fighting", "bug", "fairy"],
-    "steel": ["fire", "fighting", "ground"],
-    "fairy": ["poison", "steel"]
-}
-
-POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
-
-def download_database():
-    """Download or update Pokemon data from PokeAPI"""
-    db_path = os.path.join(resource_path, "pokedex.json")
-    icons_dir = os.path.join(resource_path, "icons")
-    
     # Buat direktori icons jika belum ada
     if not os.path.exists(icons_dir):
         os.makedirs(icons_dir)
-    
-    if not os.path.exists(db_path):
+
+    if os.path.exists(db_path) and not os.path.exists(checkpoint_path):
+        return
+
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from progressbar import ProgressBar
+
+    all_pokemon = _load_checkpoint(checkpoint_path)
+    pending = [i for i in range(1, count + 1) if i not in all_pokemon]
+    if all_pokemon:
+        print(f"Resuming Pokemon database download ({len(all_pokemon)}/{count} done)...")
+    else:
         print("Downloading Pokemon database...")
-        all_pokemon = {}
-        
-        with ProgressBar(max_value=1025) as bar:
-            # Get Pokemon data
-            for pokemon_id in range(1, 1026):  # Up to Gen 9
-                try:
-                    response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{pokemon_id}")
-                    if response.status_code == 200:
-                        pokemon_data = response.json()
-                        
-                        # Get species data for additional info
-                        species_response = requests.get(f"{POKEAPI_BASE_URL}/pokemon-species/{pokemon_id}")
-                        species_data = species_response.json() if species_response.status_code == 200 else {}
-                        
-                        # Try different sprite sources in order of preference
-                        sprite_urls = [
-                            f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{pokemon_id}.png",
-                            f"https://play.pokemonshowdown.com/sprites/gen5/{pokemon_data['name'].lower()}.png",
-                            pokemon_data['sprites']['front_default']
-                        ]
-                        
-                        sprite_downloaded = False
-                        for sprite_url in sprite_urls:
-                            if not sprite_url:
-                                continue
-                            
-                            sprite_response = requests.get(sprite_url)
-                            if sprite_response.status_code == 200:
-                                icon_path = os.path.join(icons_dir, f"icon{pokemon_id:03d}.png")
-                                with open(icon_path, 'wb') as f:
-                                    f.write(sprite_response.content)
-                                sprite_downloaded = True
-                                break
-                        
-                        if not sprite_downloaded:
-                            print(f"\nWarning: Could not download sprite for #{pokemon_id} {pokemon_data['name']}")
-                        
-                        all_pokemon[pokemon_id] = {
-                            "id": pokemon_id,
-                            "name": pokemon_data["name"],
-                            "types": [t["type"]["name"] for t in pokemon_data["types"]],
-                            "height": pokemon_data["height"],
-                            "weight": pokemon_data["weight"],
-                            "genus": next((g["genus"] for g in species_data.get("genera", []) if g["language"]["name"] == "en"), ""),
-                            "flavor_text": next((f["flavor_text"] for f in species_data.get("flavor_text_entries", []) if f["language"]["name"] == "en"), ""),
-                            "evolution_chain": species_data.get("evolution_chain", {}).get("url", "")
-                        }
-                        print(f"\rDownloaded data and sprite for #{pokemon_id} {pokemon_data['name']}")
-                        bar.update(pokemon_id)
-                except Exception as e:
-                    print(f"\nError downloading Pokemon #{pokemon_id}: {str(e)}")
-                    continue
-        
-        # Save to file
-        with open(db_path, 'w') as f:
-            json.dump(all_pokemon, f)
-        print("\nDatabase and sprites downloaded successfully!")
+
+    failed = []
+    start = time.time()
+    with open(checkpoint_path, 'w') as checkpoint, \
+            ThreadPoolExecutor(max_workers=workers) as executor, \
+            ProgressBar(max_value=count) as bar:
+        # Rewrite what survived so a torn line never precedes new records
+        for record in all_pokemon.values():
+            checkpoint.write(json.dumps(record) + "\n")
+        futures = {executor.submit(download_pokemon, pokemon_id, base_url): pokemon_id
+                   for pokemon_id in pending}
+        for future in as_completed(futures):
+            pokemon_id = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                print(f"\nError downloading Pokemon #{pokemon_id}: {str(e)}")
+                failed.append(pokemon_id)
+                continue
+            if record is not None:
+                all_pokemon[pokemon_id] = record
+                checkpoint.write(json.dumps(record) + "\n")
+                checkpoint.flush()
+            bar.update(len(all_pokemon))
+
+    elapsed = time.time() - start
+    downloaded = len(pending) - len(failed)
+    print(f"\nDownloaded {downloaded} Pokemon in {elapsed:.1f}s ({downloaded / max(elapsed, 1e-9):.1f}/s)")
+
+    if failed:
+        print(f"{len(failed)} Pokemon failed, run again to resume: {', '.join(map(str, sorted(failed)))}")
+        return
+
+    # Save to file
+    _write_database(all_pokemon, db_path)
+    os.remove(checkpoint_path)
+
+    failed_chains = backfill_evolutions(base_url, workers, db_path)
+    if failed_chains:
+        print(f"Warning: Could not download evolution chains {', '.join(map(str, failed_chains))}, "
+              "run `pokedex sync` to retry")
+
+    failed_sprites = []
+    if sprites:
+        from ..sprites import refresh_icons
+
+        print("Downloading sprites...")
+        failed_sprites = refresh_icons(sorted((number, record["name"]) for number, record in all_pokemon.items()),
+                                       icons_dir, workers)
+        if failed_sprites:
+            print(f"Warning: Could not download sprites for {', '.join(map(str, failed_sprites))}")
+
+    if failed_chains or failed_sprites:
+        print(f"Database downloaded with {len(failed_chains)} evolution chains "
+              f"and {len(failed_sprites)} sprites missing")
+    else:
+        print("Database and sprites downloaded successfully!")
 
 def get_pokemon_weakness(pokemon_types):
     """
-    Calculate Pokemon weaknesses based on its type(s)
+    Calculate Pokemon weaknesses based on its type(s), strongest first
     """
     if not pokemon_types:
         return []
-        
-    # Convert types to lowercase for consistency
-    types = [t.lower() for t in pokemon_types]
-    
-    # Get all weaknesses for each type
-    all_weaknesses = []
-    for ptype in types:
-        if ptype in POKEMON_WEAKNESS:
-            all_weaknesses.extend(POKEMON_WEAKNESS[ptype])
-    
-    # Remove duplicates and sort
-    unique_weaknesses = sorted(list(set(all_weaknesses)))
-    
-    return unique_weaknesses
+    return type_chart.weaknesses(pokemon_types)
 
 def search_pokemon(name):
     """
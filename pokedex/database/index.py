@@ -0,0 +1,248 @@
+# -*- encoding: utf-8 -*-
+
+"""Compiled binary index of pokedex.json.
+
+Layout (little-endian):
+
+    header     magic, version, record slots, name slots, source mtime/size,
+               offsets of the three sections below
+    records    one fixed-width RECORD per national dex number (slot 0 unused)
+    names      open-addressing hash table of dex numbers keyed by crc32(name)
+    strings    utf-8 string table referenced by (offset, length) pairs
+
+The reader memory-maps the file and only decodes the record it is asked for.
+"""
+
+import os
+import json
+import mmap
+import struct
+import zlib
+import tempfile
+
+from .. import resource_path
+from .type_chart import TYPES, TYPE_INDEX
+
+
+MAGIC = b"PKDX"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHIIdQIII")
+RECORD = struct.Struct("<HHIBBHHIHIHIH")
+NAME_SLOT = struct.Struct("<H")
+
+NO_TYPE = 0xFF
+NO_PARENT = 0
+UNKNOWN_PARENT = 0xFFFF
+
+database_path = os.path.join(resource_path, "pokedex.json")
+index_path = os.path.join(resource_path, "pokedex.idx")
+
+
+def _name_hash(name):
+    return zlib.crc32(name.lower().encode("utf-8"))
+
+
+def _chain_id(url):
+    return int(url.rstrip("/").split("/")[-1]) if url else 0
+
+
+def compile_index(source=database_path, target=index_path):
+    """Compile pokedex.json into the binary index format"""
+    stat = os.stat(source)
+    with open(source, "r") as f:
+        records = {int(k): v for k, v in json.load(f).items()}
+
+    slots = max(records) + 1 if records else 1
+    name_slots = 1
+    while name_slots < 2 * len(records):
+        name_slots *= 2
+
+    strings = bytearray()
+
+    def add_string(value):
+        data = (value or "").encode("utf-8")
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    table = bytearray(RECORD.size * slots)
+    names = bytearray(NAME_SLOT.size * name_slots)
+    for number in sorted(records):
+        record = records[number]
+        # Types the chart doesn't know are left out rather than failing every lookup
+        types = [TYPE_INDEX[t] for t in record["types"] if t in TYPE_INDEX] + [NO_TYPE, NO_TYPE]
+        if "evolves_from" not in record:
+            parent = UNKNOWN_PARENT
+        else:
+            parent = record["evolves_from"] or NO_PARENT
+        RECORD.pack_into(table, RECORD.size * number,
+                         number, record["height"], record["weight"], types[0], types[1],
+                         _chain_id(record["evolution_chain"]), parent,
+                         *add_string(record["name"]),
+                         *add_string(record["genus"]),
+                         *add_string(record["flavor_text"]))
+
+        slot = _name_hash(record["name"]) & (name_slots - 1)
+        while NAME_SLOT.unpack_from(names, NAME_SLOT.size * slot)[0]:
+            slot = (slot + 1) & (name_slots - 1)
+        NAME_SLOT.pack_into(names, NAME_SLOT.size * slot, number)
+
+    records_offset = HEADER.size
+    names_offset = records_offset + len(table)
+    strings_offset = names_offset + len(names)
+    header = HEADER.pack(MAGIC, VERSION, 0, slots, name_slots, stat.st_mtime, stat.st_size,
+                         records_offset, names_offset, strings_offset)
+
+    # A unique name, so processes compiling at the same time never share a file
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(target)), prefix=".pokedex-", suffix=".idx")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.write(table)
+            f.write(names)
+            f.write(strings)
+        os.replace(tmp_path, target)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+class CompiledIndex(object):
+    def __init__(self, path=index_path):
+        from .store import POKEAPI_BASE_URL  # store imports this module
+
+        # Chain URLs are rebuilt from their ids against the configured API
+        self.chain_url = POKEAPI_BASE_URL + "/evolution-chain/%d/"
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.slots, self.name_slots, self.source_mtime, self.source_size,
+         self.records_offset, self.names_offset, self.strings_offset) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("%s is not a version %d Pokédex index" % (path, VERSION))
+
+    def is_fresh(self, source=database_path):
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        return stat.st_mtime == self.source_mtime and stat.st_size == self.source_size
+
+    def _string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.data[start:start + length].decode("utf-8")
+
+    def _name(self, number):
+        fields = RECORD.unpack_from(self.data, self.records_offset + RECORD.size * number)
+        return self._string(fields[7], fields[8])
+
+    def get(self, number):
+        """Decode the record of a dex number, or None"""
+        if not 0 < number < self.slots:
+            return None
+        (number_, height, weight, type1, type2, chain, parent,
+         name_offset, name_length, genus_offset, genus_length,
+         flavor_offset, flavor_length) = RECORD.unpack_from(self.data, self.records_offset + RECORD.size * number)
+        if number_ != number:
+            return None
+        record = {
+            "id": number,
+            "name": self._string(name_offset, name_length),
+            "types": [TYPES[t] for t in (type1, type2) if t != NO_TYPE],
+            "height": height,
+            "weight": weight,
+            "genus": self._string(genus_offset, genus_length),
+            "flavor_text": self._string(flavor_offset, flavor_length),
+            "evolution_chain": self.chain_url % chain if chain else "",
+        }
+        if parent != UNKNOWN_PARENT:
+            record["evolves_from"] = parent or None
+        return record
+
+    def records(self):
+        """Decode every record, in dex order"""
+        for number in range(1, self.slots):
+            record = self.get(number)
+            if record is not None:
+                yield record
+
+    def evolution_records(self):
+        """{number: record} of every species with only the name, chain and
+        parent fields EvolutionGraph reads, skipping the other strings"""
+        records = {}
+        for number in range(1, self.slots):
+            fields = RECORD.unpack_from(self.data, self.records_offset + RECORD.size * number)
+            if fields[0] != number:
+                continue
+            chain, parent = fields[5], fields[6]
+            record = {"name": self._string(fields[7], fields[8]),
+                      "evolution_chain": self.chain_url % chain if chain else ""}
+            if parent != UNKNOWN_PARENT:
+                record["evolves_from"] = parent or None
+            records[number] = record
+        return records
+
+    def find(self, name):
+        """Resolve a name to its dex number, or None"""
+        name = name.lower().strip()
+        mask = self.name_slots - 1
+        slot = _name_hash(name) & mask
+        while True:
+            number = NAME_SLOT.unpack_from(self.data, self.names_offset + NAME_SLOT.size * slot)[0]
+            if number == 0:
+                return None
+            if self._name(number).lower() == name:
+                return number
+            slot = (slot + 1) & mask
+
+    def lookup(self, pokemon):
+        """Resolve an id or a name to a record, or None"""
+        try:
+            return self.get(int(pokemon))
+        except ValueError:
+            number = self.find(str(pokemon))
+            return self.get(number) if number is not None else None
+
+    def close(self):
+        self.data.close()
+
+
+_index = None
+
+
+def open_index(rebuild=True):
+    """Return the shared index, (re)compiling it when pokedex.json changed.
+
+    Returns None when there is no database to index.
+    """
+    global _index
+    if _index is not None:
+        if _index.is_fresh():
+            return _index
+        _index.close()  # pokedex.json changed, don't keep the old file mapped
+        _index = None
+    if not os.path.exists(database_path):
+        return None
+    try:
+        index = CompiledIndex()
+        if not index.is_fresh():
+            index.close()
+            index = None
+    except (OSError, ValueError):
+        index = None
+    if index is None:
+        if not rebuild:
+            return None
+        try:
+            compile_index()
+            index = CompiledIndex()
+        except (OSError, ValueError, KeyError):
+            return None  # Callers fall back to load_records()
+    _index = index
+    return _index
+
+
+if __name__ == "__main__":
+    compile_index()
+    print("Compiled %s" % index_path)
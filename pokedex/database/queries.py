@@ -3,32 +3,107 @@
 import os
 import sqlite3
 import logging
+import threading
 import json
 
 from .. import resource_path
 from ..exceptions import *
+from .index import open_index
+from . import type_chart
+from .store import POKEAPI_BASE_URL
 
-POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
-
-db = sqlite3.connect(os.path.join(resource_path, "veekun-pokedex.sqlite"))
-cursor = db.cursor()
+veekun_path = os.path.join(resource_path, "veekun-pokedex.sqlite")
 
 default_version = "x"
 default_language = "en"
 
+# Versions tried, in order, when the requested one has no flavor text
+fallback_versions = ["sword", "shield", "scarlet", "violet"]
+
+# Covering indexes for the lookups below, created the first time the
+# database is opened (veekun only ships the primary keys)
+INDEXES = [
+    """CREATE INDEX IF NOT EXISTS ix_species_names_lookup
+           ON pokemon_species_names (local_language_id, name COLLATE NOCASE, pokemon_species_id)""",
+    """CREATE INDEX IF NOT EXISTS ix_pokemon_species
+           ON pokemon (species_id, id, height, weight)""",
+    """CREATE INDEX IF NOT EXISTS ix_species_chain
+           ON pokemon_species (evolution_chain_id, id, evolves_from_species_id)""",
+    """CREATE INDEX IF NOT EXISTS ix_pokemon_types
+           ON pokemon_types (pokemon_id, slot, type_id)""",
+]
+
+_local = threading.local()
+_indexed = False
+_index_lock = threading.Lock()
+_identifiers = {}  # (table, identifier) -> id
+_types = None
+
+
+def get_connection():
+    """The calling thread's connection to the veekun database, opened on first use.
+
+    Connections are not shared between threads; each one keeps its own
+    statement cache for the parameterized queries below.
+    """
+    db = getattr(_local, "db", None)
+    if db is None:
+        # mode=rw: never create an empty database file when it is missing
+        db = sqlite3.connect("file:%s?mode=rw" % veekun_path, uri=True, cached_statements=64)
+        _create_indexes(db)
+        _local.db = db
+    return db
+
+
+def _create_indexes(db):
+    global _indexed
+    with _index_lock:
+        if _indexed:
+            return
+        try:
+            with db:
+                for statement in INDEXES:
+                    db.execute(statement)
+        except sqlite3.OperationalError as e:
+            # Read-only install, queries still work through the primary keys
+            logging.debug("Could not create veekun indexes: %s", e)
+        _indexed = True
+
+
+def query(sql, parameters=()):
+    return get_connection().execute(sql, parameters).fetchall()
+
+
+def _identifier_id(table, identifier):
+    """Resolve a languages/versions identifier to its id, cached per process"""
+    key = (table, identifier)
+    if key not in _identifiers:
+        rows = query("SELECT id FROM %s WHERE identifier = ?" % table, (identifier,))
+        _identifiers[key] = rows[0][0] if rows else None
+    return _identifiers[key]
+
+
+def get_language_id(language):
+    return _identifier_id("languages", language)
+
+
+def get_version_id(version):
+    return _identifier_id("versions", version)
+
+
 def get_versions():
-    cursor.execute("""SELECT identifier
-                        FROM versions
-                   """)
-    return [row[0] for row in cursor.fetchall()]
+    return [row[0] for row in query("SELECT identifier FROM versions")]
 
 
 def get_types():
-    cursor.execute("""SELECT type_id, name
-                        FROM type_names
-                       WHERE type_id < 10000 AND local_language_id=9
-                   """)
-    return {row[0]: row[1].lower() for row in cursor.fetchall()}
+    global _types
+    if _types is None:
+        rows = query("""SELECT type_id, name
+                          FROM type_names
+                         WHERE type_id < 10000 AND local_language_id = ?
+                     """, (get_language_id("en"),))
+        _types = {row[0]: row[1].lower() for row in rows}
+    return _types
 
 
 def get_pokemon_id(pokemon, language=default_language):
@@ -42,24 +117,20 @@ def get_pokemon_id(pokemon, language=default_language):
 
 
 def get_pokemon_name(id, language=default_language):
-    cursor.execute("""SELECT name
-                        FROM pokemon_species_names s
-                        JOIN languages l ON l.identifier="{language}"
-                       WHERE s.local_language_id=l.id AND s.pokemon_species_id={id}
-                   """.format(id=id, language=language))
-    return cursor.fetchall()[0][0]
+    rows = query("""SELECT name
+                      FROM pokemon_species_names
+                     WHERE pokemon_species_id = ? AND local_language_id = ?
+                 """, (id, get_language_id(language)))
+    return rows[0][0]
 
 
 def get_pokemon_by_name(name, language=default_language):
-    cursor.execute("""SELECT DISTINCT p.species_id
-                        FROM pokemon p
-                        JOIN languages l ON l.identifier="{language}"
-                        JOIN pokemon_species_names s ON s.local_language_id=l.id 
-                        AND LOWER(s.name)="{name}"
-                        WHERE p.species_id=s.pokemon_species_id
-                   """.format(name=name.lower().strip(), language=language))
-
-    rows = cursor.fetchall()
+    rows = query("""SELECT p.species_id
+                      FROM pokemon_species_names s
+                      JOIN pokemon p ON p.species_id = s.pokemon_species_id
+                     WHERE s.local_language_id = ? AND s.name = ? COLLATE NOCASE
+                     LIMIT 1
+                 """, (get_language_id(language), name.strip()))
     if len(rows) == 0:
         raise NoSuchPokemon(name)
     return rows[0][0]
@@ -67,41 +138,40 @@ def get_pokemon_by_name(name, language=default_language):
 
 def get_pokemon_type(pokemon_id):
     all_types = get_types()
-    cursor.execute("""SELECT type_id, slot
-                        FROM pokemon_types
-                       WHERE pokemon_id={pokemon_id}
-                   """.format(pokemon_id=pokemon_id))
-    types = sorted([(row[0], int(row[1])) for row in cursor.fetchall()], key=lambda t: t[1])
-    return map(lambda t: all_types[t[0]], types)
+    rows = query("""SELECT type_id
+                      FROM pokemon_types
+                     WHERE pokemon_id = ?
+                  ORDER BY slot
+                 """, (pokemon_id,))
+    return [all_types[row[0]] for row in rows]
 
 
 def get_pokemon_evolution_chain(pokemon_id, language=default_language):
-    cursor.execute("""SELECT id, evolves_from_species_id
-                        FROM pokemon_species
-                       WHERE evolution_chain_id = (SELECT evolution_chain_id FROM pokemon_species WHERE id={pokemon_id})
-                   """.format(pokemon_id=pokemon_id))
-    chain = [(row[0], get_pokemon_name(row[0], language), row[1]) for row in cursor.fetchall()]
-    # root = (pkmn for pkmn in chain if pkmn[2] is None).next()
-    root = next((pkmn for pkmn in chain if pkmn[2] is None), None)
-    tree = {root: {}}
-    del chain[chain.index(root)]
-
-    def add_evolutions(tree, root, chain):
-        evolutions = [pkmn for pkmn in chain if pkmn[2] == root[0]]
-        for evolution in evolutions:
-            tree[root][evolution] = {}
-            del chain[chain.index(evolution)]
-            add_evolutions(tree[root], evolution, chain)
-
-    add_evolutions(tree, root, chain)
-
-    return tree
+    rows = query("""SELECT p.id, n.name, p.evolves_from_species_id
+                      FROM pokemon_species p
+                      JOIN pokemon_species_names n ON n.pokemon_species_id = p.id AND n.local_language_id = ?
+                     WHERE p.evolution_chain_id = (SELECT evolution_chain_id FROM pokemon_species WHERE id = ?)
+                 """, (get_language_id(language), pokemon_id))
+    # One pass over the rows: species -> later stages, then a walk from the root
+    evolutions = {}
+    root = None
+    for pkmn in rows:
+        pkmn = tuple(pkmn)
+        if pkmn[2] is None:
+            root = pkmn
+        else:
+            evolutions.setdefault(pkmn[2], []).append(pkmn)
+
+    def subtree(stage):
+        return {evolution: subtree(evolution) for evolution in evolutions.get(stage[0], ())}
+
+    return {root: subtree(root)} if root is not None else {}
 
 
 def get_type_effectiveness():
-    cursor.execute("""
-        SELECT t1.identifier as attacker_type, 
-               t2.identifier as target_type, 
+    rows = query("""
+        SELECT t1.identifier as attacker_type,
+               t2.identifier as target_type,
                te.damage_factor
         FROM type_efficacy te
         JOIN types t1 ON te.damage_type_id = t1.id
@@ -109,83 +179,48 @@ def get_type_effectiveness():
         WHERE te.damage_factor >= 200  -- Ambil yang super effective (2x damage atau lebih)
         ORDER BY te.damage_factor DESC  -- Urutkan berdasarkan damage terbesar
     """)
-    
+
     effectiveness = {}
-    for row in cursor.fetchall():
-        attacker_type = row[0]
-        target_type = row[1]
-        damage_factor = row[2]
-        
-        if target_type not in effectiveness:
-            effectiveness[target_type] = []
-        effectiveness[target_type].append((attacker_type, damage_factor))
-    
+    for attacker_type, target_type, damage_factor in rows:
+        effectiveness.setdefault(target_type, []).append((attacker_type, damage_factor))
+
     return effectiveness
 
 
 def get_pokemon_weaknesses(pokemon_id):
     """Calculate Pokemon's top 4 most effective weaknesses"""
-    pokemon_types = list(get_pokemon_type(pokemon_id))
-    effectiveness = get_type_effectiveness()
-    
-    weakness_scores = {}
-    
-    # Hitung total effectiveness untuk setiap tipe
-    for ptype in pokemon_types:
-        if ptype in effectiveness:
-            for attacker, damage in effectiveness[ptype]:
-                if attacker not in weakness_scores:
-                    weakness_scores[attacker] = 0
-                weakness_scores[attacker] += damage / 100.0  # Normalize damage factor
-    
-    # Urutkan weakness berdasarkan total effectiveness
-    sorted_weaknesses = sorted(
-        weakness_scores.items(),
-        key=lambda x: (-x[1], x[0])  # Sort by score (descending) then by name
-    )
-    
-    # Ambil 4 weakness teratas
-    top_weaknesses = sorted_weaknesses[:4]
-    
-    # Kembalikan hanya nama tipenya
-    return [w[0] for w in top_weaknesses]
+    return type_chart.weaknesses(get_pokemon_type(pokemon_id))[:4]
+
+
+ENTRY_QUERY = """SELECT p.species_id, s.name, s.genus, f.flavor_text, p.height, p.weight
+                   FROM pokemon p
+                   JOIN pokemon_species_names s ON s.local_language_id = ? AND s.pokemon_species_id = p.species_id
+                   LEFT JOIN pokemon_species_flavor_text f
+                          ON f.language_id = s.local_language_id AND f.version_id = ? AND f.species_id = p.species_id
+                  WHERE p.species_id = ?
+              """
 
 
 def get_pokedex_entry(id, language=default_language, version=default_version):
-    cursor.execute("""SELECT p.species_id, name, genus, flavor_text, height, weight
-                        FROM pokemon p
-                        JOIN languages l ON l.identifier="{language}"
-                        JOIN versions v ON v.identifier="{version}"
-                        JOIN pokemon_species_names s ON s.local_language_id=l.id AND s.pokemon_species_id=p.species_id
-                        LEFT JOIN pokemon_species_flavor_text f ON f.language_id=l.id AND f.version_id=v.id AND f.species_id = p.species_id
-                       WHERE p.species_id={id}
-                   """.format(id=id, language=language, version=version))
-    
-    results = cursor.fetchall()
-    
-    if not results:
-        newer_versions = ["sword", "shield", "scarlet", "violet"]
-        for ver in newer_versions:
-            cursor.execute("""SELECT p.species_id, name, genus, flavor_text, height, weight
-                            FROM pokemon p
-                            JOIN languages l ON l.identifier="{language}"
-                            JOIN versions v ON v.identifier="{ver}"
-                            JOIN pokemon_species_names s ON s.local_language_id=l.id AND s.pokemon_species_id=p.species_id
-                            LEFT JOIN pokemon_species_flavor_text f ON f.language_id=l.id AND f.version_id=v.id AND f.species_id = p.species_id
-                            WHERE p.species_id={id}
-                       """.format(id=id, language=language, ver=ver))
-            results = cursor.fetchall()
-            if results:
-                break
-    
-    return results
+    language_id = get_language_id(language)
+    for version_id in [get_version_id(v) for v in [version] + fallback_versions]:
+        if version_id is None:
+            continue
+        results = query(ENTRY_QUERY, (language_id, version_id, id))
+        if results:
+            return results
+    return []
 
 
 def get_pokemon_data(pokemon_id):
     """Get Pokemon data from local JSON database"""
+    index = open_index()
+    if index is not None:
+        return index.lookup(pokemon_id)
+
     db_path = os.path.join(resource_path, "pokedex.json")
-    
+
     with open(db_path, 'r') as f:
         all_pokemon = json.load(f)
-    
+
     return all_pokemon.get(str(pokemon_id))
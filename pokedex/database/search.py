@@ -0,0 +1,157 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import heapq
+import sqlite3
+import unicodedata
+
+from .. import resource_path
+from .store import load_records
+
+veekun_path = os.path.join(resource_path, "veekun-pokedex.sqlite")
+
+
+def normalize(name):
+    """Fold case, accents and punctuation: "Mr. Mime" and "mr-mime" both give "mrmime" """
+    decomposed = unicodedata.normalize("NFKD", name.lower())
+    return "".join(c for c in decomposed if c.isalnum())
+
+
+def trigrams(key):
+    padded = "  %s " % key
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance, giving up (limit + 1) above limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class NameIndex(object):
+    """In-memory name lookups: exact, prefix (trie) and typo-tolerant (trigrams)"""
+
+    def __init__(self):
+        self.trie = {}
+        self.keys = {}  # normalized key -> (display name, dex number)
+        self.grams = {}  # trigram -> set of normalized keys
+
+    def add(self, name, number):
+        key = normalize(name)
+        if not key or key in self.keys:
+            return
+        self.keys[key] = (name, number)
+
+        node = self.trie
+        for c in key:
+            node = node.setdefault(c, {})
+        node[""] = key
+
+        for gram in trigrams(key):
+            self.grams.setdefault(gram, set()).add(key)
+
+    def exact(self, name):
+        """Dex number of a name, ignoring case, accents and punctuation"""
+        entry = self.keys.get(normalize(name))
+        return entry[1] if entry else None
+
+    def complete(self, prefix, limit=20):
+        """Names starting with prefix, shortest first"""
+        node = self.trie
+        for c in normalize(prefix):
+            node = node.get(c)
+            if node is None:
+                return []
+        found = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for c, child in node.items():
+                if c == "":
+                    found.append(child)
+                else:
+                    stack.append(child)
+        found.sort(key=lambda key: (len(key), key))
+        return [self.keys[key][0] for key in found[:limit]]
+
+    def suggest(self, name, limit=3, max_distance=None):
+        """Closest names to a misspelling as (name, dex number) pairs"""
+        key = normalize(name)
+        if not key:
+            return []
+        if max_distance is None:
+            max_distance = max(1, len(key) // 3)
+
+        shared = {}
+        for gram in trigrams(key):
+            for candidate in self.grams.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        # Only verify the candidates sharing the most trigrams
+        candidates = [c for c in shared if abs(len(c) - len(key)) <= max_distance]
+        scored = []
+        for candidate in heapq.nlargest(20, candidates, key=lambda c: (shared[c], c)):
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, -shared[candidate], candidate))
+        scored.sort()
+
+        suggestions = []
+        for _, _, candidate in scored:
+            entry = self.keys[candidate]
+            if entry[1] not in [number for _, number in suggestions]:
+                suggestions.append(entry)
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+
+def _veekun_names():
+    """Species names in every language, when the veekun database is installed"""
+    if not os.path.exists(veekun_path) or os.path.getsize(veekun_path) == 0:
+        return []
+    try:
+        db = sqlite3.connect(veekun_path)
+        try:
+            return db.execute("SELECT pokemon_species_id, name FROM pokemon_species_names").fetchall()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return []
+
+
+_index = None
+
+
+def get_index():
+    """The shared NameIndex, built once from the local databases"""
+    global _index
+    if _index is None:
+        index = NameIndex()
+        for number, record in sorted(load_records().items()):
+            index.add(record["name"], number)
+        for number, name in _veekun_names():
+            index.add(name, number)
+        _index = index
+    return _index
+
+
+def suggest(name, limit=3):
+    return [name for name, _ in get_index().suggest(name, limit=limit)]
+
+
+def complete(prefix, limit=20):
+    return get_index().complete(prefix, limit=limit)
@@ -0,0 +1,191 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import json
+import time
+import tempfile
+
+from .. import resource_path
+from .index import open_index
+from .cache import cached_get
+from ..trace import span, traced
+
+# POKEDEX_API_URL points every request at another PokeAPI, e.g. pokedex/mock_server.py
+POKEAPI_BASE_URL = os.environ.get("POKEDEX_API_URL", "https://pokeapi.co/api/v2").rstrip("/")
+REQUEST_TIMEOUT = 10
+
+database_path = os.path.join(resource_path, "pokedex.json")
+
+# Records are loaded once per process and shared by every lookup
+_records = None
+_names = None
+
+# After a connection failure the network is skipped for OFFLINE_BACKOFF seconds, so
+# batches don't retry it per Pokémon and long-running processes (daemon, server)
+# still reconnect once it is back
+OFFLINE_BACKOFF = 30
+_offline_until = 0.0
+# Bumped whenever records change, so derived data (see evolution.py) can be rebuilt
+generation = 0
+
+
+@traced("fetch")
+def fetch(url):
+    """GET through the response cache, skipping the network for a while after it failed"""
+    global _offline_until
+    if is_offline():
+        raise ConnectionError(f"Offline, not fetching {url}")
+    try:
+        return cached_get(url, timeout=REQUEST_TIMEOUT)
+    except OSError:
+        _offline_until = time.monotonic() + OFFLINE_BACKOFF
+        raise
+
+
+def is_offline():
+    return time.monotonic() < _offline_until
+
+
+def _id_from_url(url):
+    return int(url.rstrip("/").split("/")[-1])
+
+
+def load_records():
+    """Load the local database, keyed by national dex number"""
+    global _records, _names
+    if _records is None:
+        records = {}
+        if os.path.exists(database_path):
+            with span("load records"), open(database_path, "r") as f:
+                records = {int(k): v for k, v in json.load(f).items()}
+        _records = records
+        _names = {record["name"].lower(): number for number, record in records.items()}
+    return _records
+
+
+def save_records():
+    """Atomically write the in-memory records back to pokedex.json"""
+    global generation
+    generation += 1
+    records = load_records()
+    directory = os.path.dirname(database_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".pokedex-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({str(k): records[k] for k in sorted(records)}, f)
+        os.replace(tmp_path, database_path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def put_record(record):
+    global generation
+    generation += 1
+    records = load_records()
+    records[record["id"]] = record
+    _names[record["name"].lower()] = record["id"]
+
+
+def build_record(pokemon_data, species_data):
+    """Build a local database record out of PokeAPI pokemon and species documents"""
+    record = {
+        "id": pokemon_data["id"],
+        "name": pokemon_data["name"],
+        "types": [t["type"]["name"] for t in pokemon_data["types"]],
+        "height": pokemon_data["height"],
+        "weight": pokemon_data["weight"],
+        "genus": next((g["genus"] for g in species_data.get("genera", []) if g["language"]["name"] == "en"), ""),
+        "flavor_text": next((f["flavor_text"] for f in species_data.get("flavor_text_entries", []) if f["language"]["name"] == "en"), ""),
+        "evolution_chain": (species_data.get("evolution_chain") or {}).get("url", ""),
+    }
+    # Left out when the species is unknown, so it is never mistaken for a base stage
+    if "evolves_from_species" in species_data:
+        evolves_from = species_data["evolves_from_species"]
+        record["evolves_from"] = _id_from_url(evolves_from["url"]) if evolves_from else None
+    return record
+
+
+def chain_parents(chain_data):
+    """{dex number: number it evolves from, None for the base stage} of an evolution-chain document"""
+    parents = {}
+
+    def walk(node, parent):
+        number = _id_from_url(node["species"]["url"])
+        parents[number] = parent
+        for evolution in node.get("evolves_to", []):
+            walk(evolution, number)
+
+    walk(chain_data["chain"], None)
+    return parents
+
+
+def find_record(pokemon):
+    """Resolve an id or name against the local database only"""
+    if _records is None:
+        # Single lookups don't need the whole database parsed
+        index = open_index()
+        if index is not None:
+            return index.lookup(pokemon)
+    records = load_records()
+    try:
+        return records.get(int(pokemon))
+    except ValueError:
+        number = _names.get(str(pokemon).lower().strip())
+        return records.get(number) if number is not None else None
+
+
+def fetch_record(pokemon):
+    """Fetch a record from PokeAPI, returns None when it cannot be resolved"""
+    key = str(pokemon).lower().strip()
+    response = fetch(f"{POKEAPI_BASE_URL}/pokemon/{key}")
+    if response.status_code != 200:
+        return None
+    pokemon_data = response.json()
+    species_response = fetch(pokemon_data["species"]["url"])
+    species_data = species_response.json() if species_response.status_code == 200 else {}
+    return build_record(pokemon_data, species_data)
+
+
+def get_record(pokemon):
+    """Resolve a Pokémon from the local database, falling back to PokeAPI.
+
+    Records fetched from the network are written back to pokedex.json so the
+    next lookup is served locally.
+    """
+    record = find_record(pokemon)
+    if record is not None:
+        return record
+    record = fetch_record(pokemon)
+    if record is not None:
+        put_record(record)
+        save_records()
+    return record
+
+
+def fetch_species_text(number, language):
+    """Fetch genus and flavor text in a language not kept in the local database"""
+    response = fetch(f"{POKEAPI_BASE_URL}/pokemon-species/{number}")
+    if response.status_code != 200:
+        return None
+    species_data = response.json()
+    genus = next((g["genus"] for g in species_data.get("genera", []) if g["language"]["name"] == language), None)
+    flavor = next((f["flavor_text"] for f in species_data.get("flavor_text_entries", [])
+                   if f["language"]["name"] == language), None)
+    return genus, flavor
+
+
+def get_chain(record):
+    """Build the evolution tree of a record as nested {(id, Name): {...}} dicts.
+
+    Local only: families saved without evolves_from are filled in by
+    `pokedex sync` (see get.backfill_evolutions), not by lookups.
+    """
+    from .evolution import get_graph
+
+    # Membership through the index, so a lookup never parses pokedex.json
+    index = open_index() if _records is None else None
+    known = index.get(record["id"]) is not None if index is not None else record["id"] in load_records()
+    if not known:
+        return {(record["id"], record["name"].capitalize()): {}}
+    return get_graph().tree(record["id"])
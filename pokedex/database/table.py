@@ -0,0 +1,185 @@
+# -*- encoding: utf-8 -*-
+
+"""Columnar copy of the local database for filtering and sorting the dex.
+
+Each column is one array indexed by row (rows are in dex order). Types,
+weaknesses and resistances are bitmasks over type_chart.TYPES, so set
+predicates are a single AND per row. Number, height and weight also have
+sorted secondary indexes: a range predicate is two bisections, and the
+most selective predicate picks the candidate rows before the others are
+checked against the columns.
+
+    select(types=["water"], weight=(1001, None), weak_to=["electric"], order="-weight")
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from decimal import Decimal, InvalidOperation
+
+from . import store
+from .type_chart import TYPES, TYPE_INDEX, COUNT, quarters
+
+RANGE_COLUMNS = ["number", "height", "weight"]
+SORT_COLUMNS = ["number", "name", "height", "weight"]
+
+# Record units per command line unit: heights are in decimeters, weights in hectograms
+SCALES = {"number": 1, "height": 10, "weight": 10}
+
+
+def type_mask(types):
+    """Bitmask of type names, raising ValueError for unknown ones"""
+    mask = 0
+    for name in types:
+        try:
+            mask |= 1 << TYPE_INDEX[name.lower()]
+        except KeyError:
+            raise ValueError("Unknown type: %s (expected one of %s)" % (name, ", ".join(TYPES)))
+    return mask
+
+
+def _bits(mask):
+    return [i for i in range(COUNT) if mask >> i & 1]
+
+
+def _units(value, scale, rounding):
+    return int(rounding(Decimal(value.strip()) * scale))
+
+
+def parse_range(text, scale=1):
+    """Inclusive (low, high) record units of '>100', '<=2.5', '50..200', '..3' or '17'.
+
+    Values are multiplied by scale first; an open end is None.
+    """
+    text = text.strip()
+    try:
+        if ".." in text:
+            low, high = text.split("..", 1)
+            return (_units(low, scale, math.ceil) if low.strip() else None,
+                    _units(high, scale, math.floor) if high.strip() else None)
+        if text.startswith(">="):
+            return _units(text[2:], scale, math.ceil), None
+        if text.startswith("<="):
+            return None, _units(text[2:], scale, math.floor)
+        if text.startswith(">"):
+            return _units(text[1:], scale, math.floor) + 1, None
+        if text.startswith("<"):
+            return None, _units(text[1:], scale, math.ceil) - 1
+        text = text[1:] if text.startswith("=") else text
+        return _units(text, scale, math.ceil), _units(text, scale, math.floor)
+    except (InvalidOperation, OverflowError, ValueError):  # Not a number, infinite or NaN
+        raise ValueError("Invalid range: %r (try >100, <=2.5, 50..200 or 17)" % text)
+
+
+class Table(object):
+    def __init__(self, records):
+        numbers = sorted(records)
+        self.size = size = len(numbers)
+        self.numbers = array("l", numbers)
+        self.names = [records[n]["name"].lower() for n in numbers]
+        self.heights = array("l", [records[n]["height"] or 0 for n in numbers])
+        self.weights = array("l", [records[n]["weight"] or 0 for n in numbers])
+        self.types = array("l", [0]) * size
+        self.weak = array("l", [0]) * size
+        self.resists = array("l", [0]) * size
+        for row, number in enumerate(numbers):
+            types = [t for t in records[number]["types"] if t.lower() in TYPE_INDEX]
+            self.types[row] = type_mask(types)
+            multipliers = quarters(types)
+            for i in range(COUNT):
+                if multipliers[i] > 4:
+                    self.weak[row] |= 1 << i
+                elif multipliers[i] < 4:
+                    self.resists[row] |= 1 << i
+
+        # Rows (ascending) having each type or weakness, the candidates of set predicates
+        self.type_rows = [array("l", [r for r in range(size) if self.types[r] >> i & 1]) for i in range(COUNT)]
+        self.weak_rows = [array("l", [r for r in range(size) if self.weak[r] >> i & 1]) for i in range(COUNT)]
+
+        # Sorted secondary indexes: rows ordered by value (then number), and
+        # the values in that order to bisect
+        self.columns = {"number": self.numbers, "name": self.names, "height": self.heights, "weight": self.weights}
+        self.orders = {}
+        self.sorted_values = {}
+        for column in RANGE_COLUMNS:
+            values = self.columns[column]
+            order = sorted(range(size), key=values.__getitem__)
+            self.orders[column] = array("l", order)
+            self.sorted_values[column] = array("l", [values[r] for r in order])
+
+    def rows_in_range(self, column, low=None, high=None):
+        """Rows with low <= column value <= high (None: unbounded), by value"""
+        values = self.sorted_values[column]
+        start = bisect_left(values, low) if low is not None else 0
+        end = bisect_right(values, high) if high is not None else self.size
+        return self.orders[column][start:end]
+
+    def select(self, types=(), any_type=(), weak_to=(), resists=(),
+               number=None, height=None, weight=None, order="number", limit=None):
+        """Dex numbers of the rows matching every predicate.
+
+        types, weak_to and resists must all hold, any_type needs one of its
+        types; number, height and weight are inclusive (low, high) ranges in
+        record units. order is a SORT_COLUMNS name, descending with a
+        leading "-".
+        """
+        descending = order.startswith("-")
+        order = order.lstrip("-")
+        if order not in SORT_COLUMNS:
+            raise ValueError("Cannot sort by %s (expected one of %s)" % (order, ", ".join(SORT_COLUMNS)))
+
+        masks = [(self.types, type_mask(types)), (self.weak, type_mask(weak_to)),
+                 (self.resists, type_mask(resists))]
+        any_mask = type_mask(any_type)
+        ranges = [(column, bounds) for column, bounds in zip(RANGE_COLUMNS, (number, height, weight))
+                  if bounds is not None and bounds != (None, None)]
+
+        # Pick the smallest candidate set an index gives, check the rest per row
+        candidates = (self.size, None, range(self.size))
+        for column, (low, high) in ranges:
+            rows = self.rows_in_range(column, low, high)
+            if len(rows) < candidates[0]:
+                candidates = (len(rows), column, sorted(rows))
+        for index, (column, mask) in zip((self.type_rows, self.weak_rows), masks):
+            for i in _bits(mask):
+                if len(index[i]) < candidates[0]:
+                    candidates = (len(index[i]), i, index[i])
+        rows = candidates[2]
+
+        for column, mask in masks:
+            if mask:
+                rows = [r for r in rows if column[r] & mask == mask]
+        if any_mask:
+            rows = [r for r in rows if self.types[r] & any_mask]
+        for column, (low, high) in ranges:
+            if column != candidates[1]:
+                values = self.columns[column]
+                low = low if low is not None else -math.inf
+                high = high if high is not None else math.inf
+                rows = [r for r in rows if low <= values[r] <= high]
+
+        rows = list(rows)
+        if order != "number" or descending:
+            # Stable, so ties stay in dex order either way
+            rows.sort(key=self.columns[order].__getitem__, reverse=descending)
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.numbers[r] for r in rows]
+
+
+_table = None
+_generation = None
+
+
+def get_table():
+    """The table of the local database, rebuilt when its records change"""
+    global _table, _generation
+    if _table is None or _generation != store.generation:
+        _table = Table(store.load_records())
+        _generation = store.generation
+    return _table
+
+
+def select(**predicates):
+    """Dex numbers matching predicates in the local database, see Table.select"""
+    return get_table().select(**predicates)
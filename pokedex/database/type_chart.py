@@ -0,0 +1,119 @@
+# -*- encoding: utf-8 -*-
+
+"""Precomputed type effectiveness (Generation 6 onwards).
+
+Multipliers are stored as quarters in a single bytes table so that 0, ¼, ½,
+1, 2 and 4 are all exact: row (defending type 1, defending type 2) holds the
+18 attacking multipliers, and every single and dual type combination is
+computed once at import. Looking up a Pokémon is a slice of that table.
+"""
+
+from array import array
+
+TYPES = ["normal", "fighting", "flying", "poison", "ground", "rock", "bug", "ghost", "steel",
+         "fire", "water", "grass", "electric", "psychic", "ice", "dragon", "dark", "fairy"]
+TYPE_INDEX = {name: i for i, name in enumerate(TYPES)}
+
+# Attacking type: ({super effective}, {not very effective}, {no effect})
+CHART = {
+    "normal":   ((), ("rock", "steel"), ("ghost",)),
+    "fighting": (("normal", "rock", "steel", "ice", "dark"), ("flying", "poison", "bug", "psychic", "fairy"), ("ghost",)),
+    "flying":   (("fighting", "bug", "grass"), ("rock", "steel", "electric"), ()),
+    "poison":   (("grass", "fairy"), ("poison", "ground", "rock", "ghost"), ("steel",)),
+    "ground":   (("poison", "rock", "steel", "fire", "electric"), ("bug", "grass"), ("flying",)),
+    "rock":     (("flying", "bug", "fire", "ice"), ("fighting", "ground", "steel"), ()),
+    "bug":      (("grass", "psychic", "dark"), ("fighting", "flying", "poison", "ghost", "steel", "fire", "fairy"), ()),
+    "ghost":    (("ghost", "psychic"), ("dark",), ("normal",)),
+    "steel":    (("rock", "ice", "fairy"), ("steel", "fire", "water", "electric"), ()),
+    "fire":     (("bug", "steel", "grass", "ice"), ("rock", "fire", "water", "dragon"), ()),
+    "water":    (("ground", "rock", "fire"), ("water", "grass", "dragon"), ()),
+    "grass":    (("ground", "rock", "water"), ("flying", "poison", "bug", "steel", "fire", "grass", "dragon"), ()),
+    "electric": (("flying", "water"), ("grass", "electric", "dragon"), ("ground",)),
+    "psychic":  (("fighting", "poison"), ("steel", "psychic"), ("dark",)),
+    "ice":      (("flying", "ground", "grass", "dragon"), ("steel", "fire", "water", "ice"), ()),
+    "dragon":   (("dragon",), ("steel",), ("fairy",)),
+    "dark":     (("ghost", "psychic"), ("fighting", "dark", "fairy"), ()),
+    "fairy":    (("fighting", "dragon", "dark"), ("poison", "steel", "fire"), ()),
+}
+
+COUNT = len(TYPES)
+QUARTERS = {0: 0.0, 1: 0.25, 2: 0.5, 4: 1.0, 8: 2.0, 16: 4.0}
+
+
+def _single_matrix():
+    """Attacking x defending multipliers of single types, in halves"""
+    matrix = array("B", [2] * COUNT * COUNT)
+    for attacker, (double, half, zero) in CHART.items():
+        row = TYPE_INDEX[attacker] * COUNT
+        for defender in double:
+            matrix[row + TYPE_INDEX[defender]] = 4
+        for defender in half:
+            matrix[row + TYPE_INDEX[defender]] = 1
+        for defender in zero:
+            matrix[row + TYPE_INDEX[defender]] = 0
+    return matrix
+
+
+def _defense_table(single):
+    """Rows of 18 attacking multipliers (in quarters) for every defending combination.
+
+    Row index is type1 * (COUNT + 1) + (type2 + 1), with type2 = -1 for
+    single-typed Pokémon.
+    """
+    table = bytearray(COUNT * (COUNT + 1) * COUNT)
+    for first in range(COUNT):
+        for second in range(-1, COUNT):
+            offset = (first * (COUNT + 1) + second + 1) * COUNT
+            for attacker in range(COUNT):
+                halves = single[attacker * COUNT + first]
+                other = single[attacker * COUNT + second] if second >= 0 and second != first else 2
+                table[offset + attacker] = halves * other
+    return bytes(table)
+
+
+SINGLE = _single_matrix()
+DEFENSE = _defense_table(SINGLE)
+
+
+def _row(types):
+    indices = [TYPE_INDEX[t.lower()] for t in types[:2]]
+    if not indices:
+        return None
+    second = indices[1] if len(indices) > 1 else -1
+    return (indices[0] * (COUNT + 1) + second + 1) * COUNT
+
+
+def effectiveness(attacking, defending):
+    """Multiplier of one attacking type against a list of defending types"""
+    row = _row(defending)
+    if row is None:
+        return 1.0
+    return QUARTERS[DEFENSE[row + TYPE_INDEX[attacking.lower()]]]
+
+
+def quarters(types):
+    """The 18 attacking multipliers against a Pokémon as a bytes row of quarters"""
+    row = _row(types)
+    if row is None:
+        return bytes([4] * COUNT)
+    return DEFENSE[row:row + COUNT]
+
+
+def multipliers(types):
+    """Map every attacking type to its multiplier against a Pokémon"""
+    return {TYPES[i]: QUARTERS[q] for i, q in enumerate(quarters(types))}
+
+
+def weaknesses(types):
+    """Attacking types dealing more than normal damage, strongest first"""
+    row = quarters(types)
+    weak = [i for i in range(COUNT) if row[i] > 4]
+    return [TYPES[i] for i in sorted(weak, key=lambda i: (-row[i], TYPES[i]))]
+
+
+def multiplier_matrix(type_lists):
+    """Stack the rows of many Pokémon into one bytearray of len(type_lists) x 18 quarters"""
+    matrix = bytearray()
+    for types in type_lists:
+        matrix += quarters(types)
+    return matrix
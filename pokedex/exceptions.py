@@ -1,5 +1,9 @@
 # -*- encoding: utf-8 -*-
  
 class NoSuchPokemon(Exception):
-    def __init__(self, pokemon):
-        super(NoSuchPokemon, self).__init__(u"Pokémon %s not found" % pokemon) 
+    def __init__(self, pokemon, suggestions=()):
+        message = u"Pokémon %s not found" % pokemon
+        if suggestions:
+            message += u", did you mean %s?" % u" or ".join(s.capitalize() for s in suggestions)
+        super(NoSuchPokemon, self).__init__(message)
+        self.suggestions = list(suggestions)
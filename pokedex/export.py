@@ -0,0 +1,257 @@
+# -*- encoding: utf-8 -*-
+
+"""Bulk exports of the local database: NDJSON, CSV and a columnar binary format.
+
+Every writer streams, records are read and written CHUNK_ROWS at a time.
+The columnar format keeps each column of a chunk in one contiguous,
+little-endian buffer, in the spirit of Arrow record batches:
+
+    header     MAGIC, version, schema length, schema (JSON: column names
+               and types), padded to 8 bytes
+    chunks     row count, body length, then every column's buffers, each
+               padded to 8 bytes:
+                   "i"  int32 values
+                   "f"  float32 values
+                   "s"  rows + 1 uint32 offsets into the UTF-8 data, the data
+    end        a chunk of 0 rows
+
+read_columnar() reads it back without any dependency.
+"""
+
+import io
+import sys
+import csv
+import gzip
+import json
+import struct
+import itertools
+from array import array
+
+from .database.index import open_index, _chain_id
+from .database.evolution import get_graph
+from .database.store import find_record, load_records
+from .database.type_chart import TYPES, QUARTERS, weaknesses, quarters
+
+EXPORT_FORMATS = ["ndjson", "csv", "columnar"]
+# File extensions picking the format when none is given
+EXTENSIONS = {".csv": "csv", ".pkcol": "columnar"}
+
+CHUNK_ROWS = 256
+COLUMNS = ([("number", "i"), ("name", "s"), ("type1", "s"), ("type2", "s"), ("genus", "s"),
+            ("height_dm", "i"), ("weight_hg", "i"), ("chain_id", "i")]
+           + [("against_" + name, "f") for name in TYPES])
+
+MAGIC = b"PKCL"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+CHUNK = struct.Struct("<II")
+
+
+def iter_records(pokemon=None):
+    """Yield local database records one at a time.
+
+    With no selection the whole dex is walked through the memory-mapped
+    index, so records are decoded lazily instead of loading pokedex.json.
+    """
+    if pokemon is not None:
+        for item in pokemon:
+            record = find_record(item)
+            if record is None:
+                print(u"Pokémon %s not found" % item, file=sys.stderr)
+                continue
+            yield record
+        return
+
+    index = open_index()
+    if index is None:
+        records = load_records()
+        for number in sorted(records):
+            yield records[number]
+        return
+    for record in index.records():
+        yield record
+
+
+def export_record(record):
+    graph = get_graph()
+    number = record["id"]
+    exported = {
+        "number": record["id"],
+        "name": record["name"].capitalize(),
+        "genus": record["genus"],
+        "flavor": record["flavor_text"].replace("\n", " ").replace("\f", " "),
+        "types": record["types"],
+        "weaknesses": weaknesses(record["types"]),
+        "height": record["height"],
+        "weight": record["weight"],
+        "evolution_chain": record["evolution_chain"],
+    }
+    # Left out when unknown: null is a base stage
+    if "evolves_from" in record:
+        exported["evolves_from"] = record["evolves_from"]
+    exported["family"] = graph.family(number) if graph.resolved[number] else None
+    exported["ancestors"] = graph.ancestors(number)
+    exported["descendants"] = graph.descendants(number)
+    return exported
+
+
+def ndjson_lines(records):
+    """One compact JSON document per line, generated lazily"""
+    for record in records:
+        yield json.dumps(export_record(record), ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def table_rows(records):
+    """Flat rows of COLUMNS values, generated lazily"""
+    for record in records:
+        types = record["types"]
+        yield ([record["id"], record["name"].capitalize(), types[0] if types else "",
+                types[1] if len(types) > 1 else "", record["genus"] or "", record["height"],
+                record["weight"], _chain_id(record["evolution_chain"])]
+               + [QUARTERS[q] for q in quarters(types)])
+
+
+def chunks(rows, size=CHUNK_ROWS):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_stream(output, compress, write):
+    """Run write(stream) on a path or binary stream, optionally gzipped"""
+    target = open(output, "wb") if isinstance(output, str) else output
+    stream = gzip.GzipFile(fileobj=target, mode="wb") if compress else target
+    try:
+        return write(stream)
+    finally:
+        if stream is not target:
+            stream.close()  # Leaves the underlying file open
+        if target is not output:
+            target.close()
+        else:
+            target.flush()
+
+
+def write_ndjson(output, records, compress=False):
+    """Stream records as NDJSON to a path or binary stream, optionally gzipped"""
+    def write(stream):
+        count = 0
+        for line in ndjson_lines(records):
+            stream.write(line.encode("utf-8"))
+            count += 1
+        return count
+
+    return _write_stream(output, compress, write)
+
+
+def write_csv(output, records, compress=False):
+    """Stream records as CSV rows of COLUMNS, with a header line"""
+    def write(stream):
+        text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+        writer = csv.writer(text)
+        writer.writerow([name for name, _ in COLUMNS])
+        count = 0
+        for chunk in chunks(table_rows(records)):
+            writer.writerows(chunk)
+            count += len(chunk)
+        text.flush()
+        text.detach()  # Closing is up to _write_stream
+        return count
+
+    return _write_stream(output, compress, write)
+
+
+def _padded(data):
+    return data + bytes(-len(data) % 8)
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _column_buffers(kind, values):
+    if kind == "i":
+        return _padded(_little_endian(array("i", values)))
+    if kind == "f":
+        return _padded(_little_endian(array("f", values)))
+    data = [value.encode("utf-8") for value in values]
+    offsets = array("I", [0])
+    for item in data:
+        offsets.append(offsets[-1] + len(item))
+    return _padded(_little_endian(offsets)) + _padded(b"".join(data))
+
+
+def write_columnar(output, records, compress=False):
+    """Stream records in the columnar format, one chunk of CHUNK_ROWS at a time"""
+    def write(stream):
+        schema = json.dumps({"columns": COLUMNS, "chunk_rows": CHUNK_ROWS}).encode("utf-8")
+        stream.write(_padded(HEADER.pack(MAGIC, VERSION, len(schema)) + schema))
+        count = 0
+        for chunk in chunks(table_rows(records)):
+            body = b"".join(_column_buffers(kind, [row[i] for row in chunk])
+                            for i, (_, kind) in enumerate(COLUMNS))
+            stream.write(CHUNK.pack(len(chunk), len(body)))
+            stream.write(body)
+            count += len(chunk)
+        stream.write(CHUNK.pack(0, 0))
+        return count
+
+    return _write_stream(output, compress, write)
+
+
+def _read_values(kind, body, offset, rows):
+    """Decode one column from a chunk body, returns the values and the next offset"""
+    def take(typecode, count):
+        nonlocal offset
+        values = array(typecode)
+        values.frombytes(body[offset:offset + count * values.itemsize])
+        if sys.byteorder == "big":
+            values.byteswap()
+        offset += -(-count * values.itemsize // 8) * 8
+        return values
+
+    if kind in ("i", "f"):
+        return take(kind, rows).tolist(), offset
+    offsets = take("I", rows + 1)
+    data = body[offset:offset + offsets[-1]]
+    offset += -(-offsets[-1] // 8) * 8
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(rows)], offset
+
+
+def read_columnar(stream):
+    """Yield every chunk of a columnar export as {column: [values]}"""
+    header = stream.read(HEADER.size)
+    magic, version, length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a version %d columnar export" % VERSION)
+    schema = json.loads(stream.read(length).decode("utf-8"))
+    stream.read(-(HEADER.size + length) % 8)
+    while True:
+        rows, size = CHUNK.unpack(stream.read(CHUNK.size))
+        if rows == 0:
+            return
+        body = stream.read(size)
+        columns = {}
+        offset = 0
+        for name, kind in schema["columns"]:
+            columns[name], offset = _read_values(kind, body, offset, rows)
+        yield columns
+
+
+WRITERS = {"ndjson": write_ndjson, "csv": write_csv, "columnar": write_columnar}
+
+
+def export_format(output, format=None):
+    """The format to write: the one given, else from the output's extension"""
+    if format is not None:
+        return format
+    name = output[:-len(".gz")] if output and output.endswith(".gz") else output or ""
+    for extension, guessed in EXTENSIONS.items():
+        if name.endswith(extension):
+            return guessed
+    return "ndjson"
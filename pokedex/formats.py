@@ -6,6 +6,7 @@ import os
 
 from .graphics.cell_buffer import Buffer
 from .graphics.draw import *
+from .trace import traced
 
 icon_width = 32
 format_names = ["card", "json", "simple", "line", "page"]
@@ -38,7 +39,9 @@ def draw_weakness_with_color(buffer, weakness, x_pos, y_pos, bg=0):
     buffer.put_line((x_pos, y_pos), weakness_str, fg=0, bg=type_colors.get(weakness.lower(), 0))
     return len(weakness_str) + 2  # Add extra space between badges
 
-def card(pokemon, shiny=False, mega=False):
+@traced("layout")
+def render_card(pokemon, shiny=False, mega=False):
+    """Lay out a card into a new Buffer"""
     evolutions_height = get_height(next(iter(pokemon.chain.values())))
     evolutions_width = get_width(pokemon.chain)
     content_width = max([evolutions_width, len(pokemon.genus) + 3 + 8 + 12, 32])
@@ -112,7 +115,16 @@ def card(pokemon, shiny=False, mega=False):
     y_pos += 2
     draw_evolutions(buffer, pokemon.chain, pokemon.number, x0=3, y0=y_pos)
 
-    buffer.display()
+    return buffer
+
+def card(pokemon, shiny=False, mega=False):
+    render_card(pokemon, shiny=shiny, mega=mega).display()
+
+def _stages_json(stages):
+    """Evolution stages as JSON objects, None (null) when they are unknown"""
+    if stages is None:
+        return None
+    return [{"number": stage[0], "name": stage[1]} for stage in stages]
 
 def json(pokemon):
     print(json_lib.dumps({
@@ -122,7 +134,9 @@ def json(pokemon):
         "flavor": pokemon.flavor,
         "types": pokemon.types,
         "weaknesses": pokemon.weaknesses,
-        "chain": [{"number": stage[0], "name": stage[1]} for stage in pokemon.chain],
+        "chain": _stages_json(pokemon.family),
+        "ancestors": _stages_json(pokemon.ancestors),
+        "descendants": _stages_json(pokemon.descendants),
         "height": pokemon.height,
         "weight": pokemon.weight
     }, indent=4))
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""Every icon packed into one memory-mapped sprite atlas.
+
+Layout (little-endian):
+
+    header     magic, version, entry count, offset of the entry table
+    entries    one fixed-width ENTRY per icon, sorted by name (the file name
+               without .png, e.g. icon025 or icon003s_mega)
+    sprites    per icon: its RGB palette, a 256-byte palette -> xterm-256
+               table, then the top and bottom half-block cells as palette
+               indices (see sprite_cache.Sprite)
+
+Icons are decoded, scaled and quantized once by build_atlas(), drawing only
+slices the map and translates palette indices to colors.
+
+    python -m pokedex.graphics.atlas [ICONS_DIR]
+"""
+
+import os
+import sys
+import mmap
+import struct
+import bisect
+from array import array
+
+from .. import resource_path
+from .colors import TRUECOLOR
+from .conversion import rgb_to_short
+from .sprite_cache import Sprite, SPRITE_SIZE, _open_icon
+
+ICONS_DIR = os.path.join(resource_path, "icons")
+atlas_path = os.path.join(resource_path, "sprites.atlas")
+
+MAGIC = b"PKAT"
+VERSION = 1
+HEADER = struct.Struct("<4sHII")
+# name, sprite offset, width, height (pixels), vertical offset, palette size
+ENTRY = struct.Struct("<32sIHHhH")
+# The palette index after the last color pads the bottom row of odd heights
+MAX_COLORS = 255
+
+
+def _encode_icon(path):
+    """Palette, xterm table and cell indices of one icon, None when it has
+    too many colors for a byte per pixel (needs Pillow)"""
+    image = _open_icon(path, SPRITE_SIZE)
+    width, height = image.size
+    colors = image.getcolors(MAX_COLORS)
+    if colors is None:
+        return None
+
+    data = image.tobytes()
+    palette = {}
+    pixels = bytearray(width * height)
+    for i, color in enumerate(zip(data[0::3], data[1::3], data[2::3])):
+        pixels[i] = palette.setdefault(color, len(palette))
+    pad = len(palette)
+
+    top = bytearray()
+    bottom = bytearray()
+    for y in range(0, height, 2):
+        top += pixels[y * width:(y + 1) * width]
+        bottom += pixels[(y + 1) * width:(y + 2) * width] if y + 1 < height else bytes([pad]) * width
+
+    colors = sorted(palette, key=palette.get)
+    xterm = bytearray(256)
+    for color, index in palette.items():
+        xterm[index] = rgb_to_short(*color)
+    blob = bytes(c for color in colors for c in color) + bytes(xterm) + bytes(top) + bytes(bottom)
+    return width, height, (SPRITE_SIZE - height) // 2, len(colors), blob
+
+
+def build_atlas(icons_dir=ICONS_DIR, target=atlas_path):
+    """Pack every PNG in icons_dir into an atlas file, returns the icon count.
+
+    Icons the atlas can't hold (long names, more than MAX_COLORS colors)
+    are left out, drawing falls back to the sprite cache for them.
+    """
+    encoded = []
+    for name in sorted(os.listdir(icons_dir)):
+        key = name[:-len(".png")].encode("utf-8")
+        if not name.endswith(".png") or len(key) > 32:
+            continue
+        icon = _encode_icon(os.path.join(icons_dir, name))
+        if icon is not None:
+            encoded.append((key, icon))
+    encoded.sort()  # By the NUL padded bytes find() searches
+
+    entries = []
+    blobs = []
+    offset = HEADER.size + ENTRY.size * len(encoded)
+    for key, (width, height, y_offset, count, blob) in encoded:
+        entries.append(ENTRY.pack(key, offset, width, height, y_offset, count))
+        blobs.append(blob)
+        offset += len(blob)
+
+    tmp_path = "%s.%d.tmp" % (target, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), HEADER.size))
+        f.writelines(entries)
+        f.writelines(blobs)
+    os.replace(tmp_path, target)
+    return len(entries)
+
+
+class Atlas(object):
+    def __init__(self, path=atlas_path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mtime = os.fstat(f.fileno()).st_mtime
+        magic, version, self.count, self.entries_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError("%s is not a version %d sprite atlas" % (path, VERSION))
+        self.view = memoryview(self.data)
+        self.sprites = {}  # (name, truecolor) -> Sprite
+
+    def _key(self, i):
+        start = self.entries_offset + ENTRY.size * i
+        return self.data[start:start + 32]
+
+    def find(self, name):
+        """Entry fields of an icon name, or None"""
+        key = name.encode("utf-8").ljust(32, b"\0")
+        if len(key) > 32:
+            return None
+        # Binary search over the sorted, fixed-width names in place
+        i = bisect.bisect_left(_Keys(self), key)
+        if i < self.count and self._key(i) == key:
+            return ENTRY.unpack_from(self.data, self.entries_offset + ENTRY.size * i)
+        return None
+
+    def sprite(self, name, truecolor=False):
+        """The Sprite of an icon, or None when the atlas does not have it"""
+        sprite = self.sprites.get((name, truecolor))
+        if sprite is not None:
+            return sprite
+        entry = self.find(name)
+        if entry is None:
+            return None
+
+        _, offset, width, height, y_offset, count = entry
+        cells = width * ((height + 1) // 2)
+        palette = offset
+        table = palette + 3 * count
+        top = table + 256
+        bottom = top + cells
+        if truecolor:
+            rgb = self.view[palette:table]
+            colors = [TRUECOLOR | (rgb[i] << 16) | (rgb[i + 1] << 8) | rgb[i + 2] for i in range(0, 3 * count, 3)]
+            colors.append(0)  # Padding, like sprite_cache.truecolor_sprite
+            top_colors = array("l", map(colors.__getitem__, self.view[top:bottom]))
+            bottom_colors = array("l", map(colors.__getitem__, self.view[bottom:bottom + cells]))
+        else:
+            xterm = self.data[table:top]
+            top_colors = array("l", list(self.data[top:bottom].translate(xterm)))
+            bottom_colors = array("l", list(self.data[bottom:bottom + cells].translate(xterm)))
+
+        sprite = self.sprites[(name, truecolor)] = Sprite(width, height, y_offset, top_colors, bottom_colors)
+        return sprite
+
+
+class _Keys(object):
+    """Sequence view of the atlas names for bisect"""
+
+    def __init__(self, atlas):
+        self.atlas = atlas
+
+    def __len__(self):
+        return self.atlas.count
+
+    def __getitem__(self, i):
+        return self.atlas._key(i)
+
+
+_atlas = None
+_opened = False
+
+
+def open_atlas(path=atlas_path):
+    """The shared Atlas, or None when none was built"""
+    global _atlas, _opened
+    if not _opened:
+        _opened = True
+        try:
+            _atlas = Atlas(path)
+        except (OSError, ValueError):
+            _atlas = None
+    return _atlas
+
+
+def atlas_sprite(path, stat, truecolor=False):
+    """Sprite of an icon file from the atlas, None if it is not packed there
+    or the icon changed after the atlas was built"""
+    directory, name = os.path.split(os.path.abspath(path))
+    if directory != os.path.abspath(ICONS_DIR) or not name.endswith(".png"):
+        return None
+    atlas = open_atlas()
+    if atlas is None or stat.st_mtime > atlas.mtime:
+        return None
+    return atlas.sprite(name[:-len(".png")], truecolor)
+
+
+if __name__ == "__main__":
+    print("Packed %d icons into %s" % (build_atlas(*sys.argv[1:2]), atlas_path))
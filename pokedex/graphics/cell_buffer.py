@@ -2,57 +2,173 @@
 from __future__ import print_function
 
 from .colors import *
+from ..trace import span, traced
 
 import collections
+from array import array
 
 
 Cell = collections.namedtuple("Cell", "character fg bg")
 
 
 class Buffer(object):
+    """A grid of character cells stored as three flat, row-major planes.
+
+    characters holds one single-character string per cell (shared string
+    objects, nothing is allocated per cell), fg and bg hold colors as ints
+    (see colors.py) in arrays.
+    """
+
     def __init__(self, width=80, height=16):
         self.width = width
         self.height = height
-        self.buffer = [[Cell(" ", 15, -1) for x in range(width)] for y in range(height)]
+        size = width * height
+        self.characters = [" "] * size
+        self.fg = array("l", [15]) * size
+        self.bg = array("l", [-1]) * size
+
+    def get_cell(self, position):
+        x, y = position
+        i = y * self.width + x
+        return Cell(self.characters[i], self.fg[i], self.bg[i])
 
     def put_cell(self, position, character, fg=15, bg=-1):
         x, y = position
-        assert x >= 0
-        assert y >= 0
-        assert x < self.width
-        assert y < self.height
+        assert 0 <= x < self.width and 0 <= y < self.height
 
         assert isinstance(character, str)
         if len(character) == 0:
             character = " "
 
-        self.buffer[y][x] = Cell(character, fg, bg)
+        i = y * self.width + x
+        self.characters[i] = character
+        self.fg[i] = fg
+        self.bg[i] = bg
 
     def put_line(self, position, line, fg=15, bg=-1):
         x, y = position
-        for i, char in enumerate(line):
-            self.put_cell((x+i, y), char, fg, bg)
+        length = len(line)
+        if length == 0:
+            return
+        assert 0 <= x and x + length <= self.width and 0 <= y < self.height
+
+        i = y * self.width + x
+        self.characters[i:i + length] = line
+        self.fg[i:i + length] = array("l", [fg]) * length
+        self.bg[i:i + length] = array("l", [bg]) * length
+
+    def put_row(self, position, character, fg, bg):
+        """Blit a run of cells sharing one character, clipped to the buffer.
+
+        fg and bg are arrays ("l") holding one color per cell.
+        """
+        x, y = position
+        assert 0 <= x and 0 <= y < self.height
+        length = min(len(fg), self.width - x)
+        if length <= 0:
+            return
+
+        i = y * self.width + x
+        self.characters[i:i + length] = [character] * length
+        self.fg[i:i + length] = fg[:length]
+        self.bg[i:i + length] = bg[:length]
+
+    def blit(self, source, position):
+        """Copy another Buffer into this one at position, clipped to this buffer"""
+        x, y = position
+        length = min(source.width, self.width - x)
+        for row in range(max(0, -y), min(source.height, self.height - y)):
+            i = (y + row) * self.width + x
+            j = row * source.width
+            self.characters[i:i + length] = source.characters[j:j + length]
+            self.fg[i:i + length] = source.fg[j:j + length]
+            self.bg[i:i + length] = source.bg[j:j + length]
+
+    def diff(self, previous):
+        """Yield (y, start, end) runs of cells that differ from a same-sized previous Buffer"""
+        characters, fgs, bgs = self.characters, self.fg, self.bg
+        old_characters, old_fgs, old_bgs = previous.characters, previous.fg, previous.bg
+        for y in range(self.height):
+            row = y * self.width
+            if (characters[row:row + self.width] == old_characters[row:row + self.width]
+                    and fgs[row:row + self.width] == old_fgs[row:row + self.width]
+                    and bgs[row:row + self.width] == old_bgs[row:row + self.width]):
+                continue
+            start = None
+            for x in range(self.width):
+                i = row + x
+                changed = characters[i] != old_characters[i] or fgs[i] != old_fgs[i] or bgs[i] != old_bgs[i]
+                if changed and start is None:
+                    start = x
+                elif not changed and start is not None:
+                    yield y, start, x
+                    start = None
+            if start is not None:
+                yield y, start, self.width
+
+    def render_diff(self, previous=None):
+        """Escape codes turning a terminal showing previous into this Buffer.
+
+        Only changed runs are written, each preceded by a cursor move. Without
+        a previous Buffer of the same size the screen is cleared and redrawn.
+        """
+        if previous is None or (previous.width, previous.height) != (self.width, self.height):
+            return "\033[H\033[2J" + "\r\n".join(self.render())
+
+        characters, fgs, bgs = self.characters, self.fg, self.bg
+        parts = []
+        last_fg, last_bg = None, None
+        for y, start, end in self.diff(previous):
+            parts.append("\033[%d;%dH" % (y + 1, start + 1))
+            row = y * self.width
+            run = row + start
+            for i in range(row + start, row + end):
+                fg, bg = fgs[i], bgs[i]
+                if fg != last_fg or bg != last_bg:
+                    parts.append("".join(characters[run:i]))
+                    run = i
+                    if fg != last_fg:
+                        parts.append(format_fg(fg))
+                        last_fg = fg
+                    if bg != last_bg:
+                        parts.append(format_bg(bg))
+                        last_bg = bg
+            parts.append("".join(characters[run:row + end]))
+        if parts:
+            parts.append(reset_code)
+        return "".join(parts)
+
+    def render_line(self, y):
+        characters, fgs, bgs = self.characters, self.fg, self.bg
+        start = y * self.width
+        end = start + self.width
+        parts = []
+        last_fg, last_bg = -1, -1
+        run = start
+
+        for i in range(start, end):
+            fg, bg = fgs[i], bgs[i]
+            if fg != last_fg or bg != last_bg:
+                # Flush the run of cells sharing the previous colors
+                parts.append("".join(characters[run:i]))
+                run = i
+                if fg != last_fg:
+                    parts.append(format_fg(fg))
+                    last_fg = fg
+                if bg != last_bg:
+                    parts.append(format_bg(bg))
+                    last_bg = bg
+        parts.append("".join(characters[run:end]))
+        parts.append(reset_code)
+        return "".join(parts)
 
+    @traced("render")
     def render(self):
-        output = []
-        for line in self.buffer:
-            result = ""
-            last_fg, last_bg = -1, -1
-
-            for cell in line:
-                if cell.fg != last_fg:
-                    result += format_fg(cell.fg)
-                    last_fg = cell.fg
-                if cell.bg != last_bg:
-                    result += format_bg(cell.bg)
-                    last_bg = cell.bg
-                result += cell.character
-            result += reset_code
-            output.append(result)
-
-        return output
+        return [self.render_line(y) for y in range(self.height)]
 
     def display(self):
-        print()
-        for line in self.render():
-            print(line)
+        lines = self.render()
+        with span("write"):
+            print()
+            for line in lines:
+                print(line)
@@ -1,22 +1,57 @@
 # -*- coding: utf-8 -*-
 
-from .conversion import rgb2short
+import os
+
+from .conversion import rgb_to_short
+
+# Colors are ints: -1 is the terminal default, 0-255 an xterm-256 index and
+# TRUECOLOR | 0xRRGGBB a 24-bit color.
+TRUECOLOR = 1 << 24
+
+_truecolor = os.environ.get("COLORTERM", "").lower() in ("truecolor", "24bit")
+
+
+def use_truecolor(enabled):
+    """Select the 24-bit (True) or 256-color (False) escape code backend"""
+    global _truecolor
+    _truecolor = bool(enabled)
+
+
+def truecolor_enabled():
+    return _truecolor
+
+
+def rgb(color):
+    r, g, b = color[:3]
+    return TRUECOLOR | (r << 16) | (g << 8) | b
+
+
+def to_rgb(color):
+    return (color >> 16) & 0xff, (color >> 8) & 0xff, color & 0xff
+
 
 def rgb_to_xterm(color):
-    hex_color = "%02x%02x%02x" % color
-    return int(rgb2short(hex_color)[0])
+    return rgb_to_short(*color[:3])
 
 reset_code = "\033[0m"
 
 def format_fg(fg):
+    if fg >= TRUECOLOR:
+        if _truecolor:
+            return "\033[38;2;%d;%d;%dm" % to_rgb(fg)
+        fg = rgb_to_short(*to_rgb(fg))
     return "\033[38;5;%dm" % fg
 
 def format_bg(bg):
     if bg == -1:
         return "\033[49m"
+    if bg >= TRUECOLOR:
+        if _truecolor:
+            return "\033[48;2;%d;%d;%dm" % to_rgb(bg)
+        bg = rgb_to_short(*to_rgb(bg))
     return "\033[48;5;%dm" % bg
 
 def format_color(text, fg=15, bg=0):
     fg_code = format_fg(fg)
     bg_code = format_bg(bg)
-    return fg_code + bg_code + text + reset_code
\ No newline at end of file
+    return fg_code + bg_code + text + reset_code
@@ -291,8 +291,27 @@ def _create_dicts():
     return rgb2short_dict, short2rgb_dict
 
 
+_dicts = None
+
+
+def _get_dicts():
+    # Built on first use, most runs never convert a hex string
+    global _dicts
+    if _dicts is None:
+        _dicts = _create_dicts()
+    return _dicts
+
+
+def __getattr__(name):
+    if name == "RGB2SHORT_DICT":
+        return _get_dicts()[0]
+    if name == "SHORT2RGB_DICT":
+        return _get_dicts()[1]
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
 def short2rgb(short):
-    return SHORT2RGB_DICT[short]
+    return _get_dicts()[1][short]
 
 
 def rgb2short(rgb):
@@ -324,8 +343,66 @@ def rgb2short(rgb):
             i += 1
     #print '***', res
     res = ''.join([ ('%02.x' % i) for i in res ])
-    equiv = RGB2SHORT_DICT[ res ]
+    equiv = _get_dicts()[0][ res ]
     #print '***', res, equiv
     return equiv, res
 
-RGB2SHORT_DICT, SHORT2RGB_DICT = _create_dicts()
\ No newline at end of file
+
+CUBE_STEPS = (0x00, 0x5f, 0x87, 0xaf, 0xd7, 0xff)
+GRAY_STEPS = tuple(8 + 10 * i for i in range(24))
+
+
+def _nearest_table(steps):
+    """Byte value -> index of the closest step (ties go up, like rgb2short)"""
+    table = bytearray(256)
+    i = 0
+    for value in range(256):
+        # Steps are ascending, move up while the next one is at least as close
+        while i + 1 < len(steps) and steps[i + 1] - value <= value - steps[i]:
+            i += 1
+        table[value] = i
+    return bytes(table)
+
+
+# Per-channel lookup tables indexed by byte value
+CUBE_INDEX = _nearest_table(CUBE_STEPS)
+GRAY_INDEX = _nearest_table(GRAY_STEPS)
+
+
+def rgb_to_short(r, g, b):
+    """ Closest xterm-256 color index, considering the 6x6x6 cube and the
+    24-step grayscale ramp.
+    >>> rgb_to_short(0x12, 0x34, 0x56)
+    23
+    >>> rgb_to_short(0x80, 0x80, 0x80)
+    244
+    """
+    ri, gi, bi = CUBE_INDEX[r], CUBE_INDEX[g], CUBE_INDEX[b]
+    cr, cg, cb = CUBE_STEPS[ri], CUBE_STEPS[gi], CUBE_STEPS[bi]
+    cube_distance = (cr - r) ** 2 + (cg - g) ** 2 + (cb - b) ** 2
+
+    gray = GRAY_INDEX[(r + g + b) // 3]
+    level = GRAY_STEPS[gray]
+    gray_distance = (level - r) ** 2 + (level - g) ** 2 + (level - b) ** 2
+
+    if gray_distance < cube_distance:
+        return 232 + gray
+    return 16 + 36 * ri + 6 * gi + bi
+
+
+def quantize_image(image):
+    """ Map a whole Pillow image to xterm-256 indices.
+    @returns: List of rows, each a bytearray of palette indices.
+    Every distinct color is resolved once through the lookup tables.
+    """
+    image = image.convert("RGB")
+    width, height = image.size
+    data = image.tobytes()
+    colors = {}
+    indices = bytearray(width * height)
+    for i, color in enumerate(zip(data[0::3], data[1::3], data[2::3])):
+        index = colors.get(color)
+        if index is None:
+            index = colors[color] = rgb_to_short(*color)
+        indices[i] = index
+    return [indices[y * width:(y + 1) * width] for y in range(height)]
\ No newline at end of file
@@ -2,14 +2,15 @@
 
 import os
 import textwrap
-from PIL import Image
 
 from .. import resource_path
-from .colors import rgb_to_xterm
-from .conversion import rgb2short
+from .colors import truecolor_enabled
+from .sprite_cache import load_sprite
 
 
 block_top = "▀"
+# Drawn for Pokémon without an icon (none are bundled past #721)
+missing_icon = os.path.join(resource_path, "icons", "icon000.png")
 numbers = {
     "0": [u"┌─┐",
           u"│ │",
@@ -46,25 +47,26 @@ numbers = {
           u"   "],
 }
 
+# xterm-256 indices of the official type colors (hex in the comments)
 type_colors = {
-    "normal":   int(rgb2short("A8A77A")[0]),
-    "fire":     int(rgb2short("EE8130")[0]),
-    "water":    int(rgb2short("6390F0")[0]),
-    "electric": int(rgb2short("F7D02C")[0]),
-    "grass":    int(rgb2short("7AC74C")[0]),
-    "ice":      int(rgb2short("96D9D6")[0]),
-    "fighting": int(rgb2short("C22E28")[0]),
-    "poison":   int(rgb2short("A33EA1")[0]),
-    "ground":   int(rgb2short("E2BF65")[0]),
-    "flying":   int(rgb2short("A98FF3")[0]),
-    "psychic":  int(rgb2short("F95587")[0]),
-    "bug":      int(rgb2short("A6B91A")[0]),
-    "rock":     int(rgb2short("B6A136")[0]),
-    "ghost":    int(rgb2short("735797")[0]),
-    "dragon":   int(rgb2short("6F35FC")[0]),
-    "dark":     int(rgb2short("705746")[0]),
-    "steel":    int(rgb2short("B7B7CE")[0]),
-    "fairy":    int(rgb2short("D685AD")[0]),
+    "normal":   144,  # A8A77A
+    "fire":     209,  # EE8130
+    "water":    69,   # 6390F0
+    "electric": 220,  # F7D02C
+    "grass":    113,  # 7AC74C
+    "ice":      116,  # 96D9D6
+    "fighting": 124,  # C22E28
+    "poison":   133,  # A33EA1
+    "ground":   179,  # E2BF65
+    "flying":   141,  # A98FF3
+    "psychic":  204,  # F95587
+    "bug":      142,  # A6B91A
+    "rock":     143,  # B6A136
+    "ghost":    96,   # 735797
+    "dragon":   63,   # 6F35FC
+    "dark":     59,   # 705746
+    "steel":    146,  # B7B7CE
+    "fairy":    175,  # D685AD
 }
 
 
@@ -89,30 +91,18 @@ def clean_sprite(image):
     return image
 
 def draw_image(buffer, path, x0=0, y0=0):
-    image = Image.open(path).convert("RGB")
-    
-    # Ukuran standar untuk sprite Let's Go
-    max_size = 32  # Tetap gunakan 32 untuk tampilan di terminal
-    
-    # Hitung rasio untuk scaling sambil mempertahankan aspek ratio
-    ratio = min(max_size / image.width, max_size / image.height)
-    new_size = (int(image.width * ratio), int(image.height * ratio))
-    
-    # Resize dengan nearest neighbor untuk mempertahankan ketajaman pixel art
-    image = image.resize(new_size, Image.NEAREST)
-    
-    pixels = image.load()
-    width, height = image.size
-
-    # Center the image vertically
-    y_offset = (max_size - height) // 2
-    
-    for y in range(0, height, 2):
-        for x in range(width):
-            if x + x0 < buffer.width and y + y0 + y_offset < buffer.height * 2:
-                color_top = rgb_to_xterm(pixels[x, y])
-                color_bottom = rgb_to_xterm(pixels[x, y + 1]) if y + 1 < height else 0
-                buffer.put_cell((x0 + x, (y0 + y + y_offset) // 2), u"▀", color_top, color_bottom)
+    # Cells come from the sprite cache, Pillow is only needed on a miss
+    try:
+        sprite = load_sprite(path, truecolor=truecolor_enabled())
+    except FileNotFoundError:
+        sprite = load_sprite(missing_icon, truecolor=truecolor_enabled())
+    width = sprite.width
+
+    for y in range(0, sprite.height, 2):
+        if y + y0 + sprite.y_offset < buffer.height * 2:
+            row = (y // 2) * width
+            buffer.put_row((x0, (y0 + y + sprite.y_offset) // 2), u"▀",
+                           sprite.top[row:row + width], sprite.bottom[row:row + width])
 
 
 def draw_number(buffer, number, x0=0, y0=0, fg=15):
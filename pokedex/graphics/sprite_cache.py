@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import struct
+import zlib
+import collections
+from array import array
+
+from .. import resource_path
+from .colors import TRUECOLOR
+from .conversion import quantize_image
+from ..trace import traced
+
+SPRITE_CACHE_DIR = os.path.join(resource_path, "cache", "sprites")
+SPRITE_SIZE = 32
+
+MAGIC = b"PKSP"
+VERSION = 4
+# magic, version, icon mtime, icon size, width, height (pixels), vertical offset, bytes per color
+HEADER = struct.Struct("<4sHdQHHhB")
+
+# One cell per two pixel rows: top[row * width + x] and bottom[row * width + x]
+# are the colors of the upper and lower half block, as arrays ("l") of
+# xterm-256 indices or packed 24-bit colors (see colors.rgb) for truecolor
+# sprites.
+Sprite = collections.namedtuple("Sprite", "width height y_offset top bottom")
+
+# (path, truecolor) -> (mtime, size, Sprite) of the sprites loaded by this process
+_loaded = {}
+
+
+def _open_icon(path, max_size):
+    from PIL import Image
+
+    image = Image.open(path).convert("RGB")
+
+    # Hitung rasio untuk scaling sambil mempertahankan aspek ratio
+    ratio = min(max_size / image.width, max_size / image.height)
+    new_size = (int(image.width * ratio), int(image.height * ratio))
+
+    # Resize dengan nearest neighbor untuk mempertahankan ketajaman pixel art
+    return image.resize(new_size, Image.NEAREST)
+
+
+@traced("quantize")
+def quantize_sprite(path, max_size=SPRITE_SIZE):
+    """Decode, scale and quantize an icon into a Sprite (needs Pillow)"""
+    image = _open_icon(path, max_size)
+    width, height = image.size
+    grid = quantize_image(image)
+    top = bytearray()
+    bottom = bytearray()
+    for y in range(0, height, 2):
+        top += grid[y]
+        bottom += grid[y + 1] if y + 1 < height else bytes(width)
+
+    # Center the image vertically
+    y_offset = (max_size - height) // 2
+    return Sprite(width, height, y_offset, array("l", list(top)), array("l", list(bottom)))
+
+
+@traced("quantize")
+def truecolor_sprite(path, max_size=SPRITE_SIZE):
+    """Decode and scale an icon into a Sprite of 24-bit colors (needs Pillow)"""
+    image = _open_icon(path, max_size)
+    width, height = image.size
+    data = image.tobytes()
+    colors = [TRUECOLOR | (r << 16) | (g << 8) | b for r, g, b in zip(data[0::3], data[1::3], data[2::3])]
+    top = array("l")
+    bottom = array("l")
+    for y in range(0, height, 2):
+        top.extend(colors[y * width:(y + 1) * width])
+        bottom.extend(colors[(y + 1) * width:(y + 2) * width] if y + 1 < height else [0] * width)
+    return Sprite(width, height, (max_size - height) // 2, top, bottom)
+
+
+def _pack(colors, depth):
+    if depth == 1:
+        return array("B", colors).tobytes()  # bytes() of an array("l") is its raw machine words
+    packed = bytearray()
+    for color in colors:
+        packed += (color & 0xffffff).to_bytes(3, "big")
+    return bytes(packed)
+
+
+def _unpack(data, depth):
+    if depth == 1:
+        return array("l", list(data))
+    return array("l", (TRUECOLOR | int.from_bytes(data[i:i + 3], "big") for i in range(0, len(data), 3)))
+
+
+def cache_path(path, truecolor=False):
+    path = os.path.abspath(path)
+    name = os.path.splitext(os.path.basename(path))[0]
+    suffix = "-rgb" if truecolor else ""
+    return os.path.join(SPRITE_CACHE_DIR, "%s-%08x%s.bin" % (name, zlib.crc32(path.encode("utf-8")), suffix))
+
+
+def _read(path, stat, truecolor=False):
+    try:
+        with open(cache_path(path, truecolor), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, version, mtime, size, width, height, y_offset, depth = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or mtime != stat.st_mtime or size != stat.st_size:
+        return None
+    length = width * ((height + 1) // 2) * depth
+    top = data[HEADER.size:HEADER.size + length]
+    bottom = data[HEADER.size + length:HEADER.size + 2 * length]
+    if len(bottom) != length:
+        return None
+    return Sprite(width, height, y_offset, _unpack(top, depth), _unpack(bottom, depth))
+
+
+def _write(path, stat, sprite, truecolor=False):
+    target = cache_path(path, truecolor)
+    depth = 3 if truecolor else 1
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_path = "%s.%d.tmp" % (target, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, stat.st_mtime, stat.st_size,
+                            sprite.width, sprite.height, sprite.y_offset, depth))
+        f.write(_pack(sprite.top, depth))
+        f.write(_pack(sprite.bottom, depth))
+    os.replace(tmp_path, target)
+
+
+@traced("sprite load")
+def load_sprite(path, truecolor=False):
+    """Return the Sprite of an icon, decoding and caching it on a miss.
+
+    Bundled icons come from the sprite atlas when one was built. Truecolor
+    sprites keep the original RGB and skip quantization.
+    """
+    from .atlas import atlas_sprite
+
+    stat = os.stat(path)
+    loaded = _loaded.get((path, truecolor))
+    if loaded is not None and loaded[:2] == (stat.st_mtime, stat.st_size):
+        return loaded[2]
+
+    sprite = atlas_sprite(path, stat, truecolor)
+    if sprite is None:
+        sprite = _read(path, stat, truecolor)
+        if sprite is None:
+            sprite = truecolor_sprite(path) if truecolor else quantize_sprite(path)
+            try:
+                _write(path, stat, sprite, truecolor)
+            except OSError:
+                pass  # Read-only install, just don't cache
+    _loaded[(path, truecolor)] = (stat.st_mtime, stat.st_size, sprite)
+    return sprite
+
+
+def build_cache(icons_dir=os.path.join(resource_path, "icons"), truecolor=False):
+    """Decode every icon that has no up-to-date cache entry"""
+    built = 0
+    for name in sorted(os.listdir(icons_dir)):
+        if not name.endswith(".png"):
+            continue
+        path = os.path.join(icons_dir, name)
+        stat = os.stat(path)
+        if _read(path, stat, truecolor) is None:
+            sprite = truecolor_sprite(path) if truecolor else quantize_sprite(path)
+            _write(path, stat, sprite, truecolor)
+            built += 1
+    return built
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if arg != "--truecolor"]
+    print("Cached %d sprites" % build_cache(*args, truecolor="--truecolor" in sys.argv))
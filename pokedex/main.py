@@ -2,38 +2,253 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 
+import re
+import sys
 import click
 
-from .database.get import download_database
 from .exceptions import *
 from . import formats
 
 __version__ = "0.1.4"
 
 
-@click.command()
-@click.argument("pokemon")
+def expand_pokemon(arguments):
+    """Expand ids, names and inclusive ranges like 1-151 into single lookups"""
+    for argument in arguments:
+        for item in filter(None, (part.strip() for part in argument.split(","))):
+            match = re.match(r"^(\d+)-(\d+)$", item)
+            if match:
+                first, last = int(match.group(1)), int(match.group(2))
+                step = 1 if last >= first else -1
+                for number in range(first, last + step, step):
+                    yield str(number)
+            else:
+                yield item
+
+
+class PokedexGroup(click.Group):
+    """Runs the show command unless the first argument names another command"""
+
+    def parse_args(self, ctx, args):
+        args = list(args)
+        options = 1 if args[:1] == ["--profile"] else 0
+        rest = args[options:]
+        if not rest or (rest[0] not in self.commands and rest[0] not in ("--help", "--version")):
+            args = args[:options] + ["show"] + rest
+        return super(PokedexGroup, self).parse_args(ctx, args)
+
+
+def complete_pokemon(ctx, param, incomplete):
+    from .database.search import complete
+    return complete(incomplete)
+
+
+def read_pokemon(pokemon, from_file):
+    arguments = list(pokemon)
+    if from_file is not None:
+        arguments.extend(line.strip() for line in from_file if line.strip())
+    return arguments
+
+
+@click.group(cls=PokedexGroup)
+@click.version_option(__version__)
+@click.option("--profile", is_flag=True, help="Print time spent per stage to stderr on exit, must come before COMMAND (POKEDEX_TRACE=FILE.json writes a Chrome trace).")
+def pokedex(profile):
+    """Command-line interface for a quick Pokédex reference.
+
+    Without a command, POKEMON arguments are shown (see pokedex show --help).
+    """
+    if profile:
+        from . import trace
+        trace.enable()
+
+
+@pokedex.command()
+@click.argument("pokemon", nargs=-1, shell_complete=complete_pokemon)
 @click.option("-s", "--shiny", is_flag=True, help=u"Show shiny version of the Pokémon.")
 @click.option("-m", "--mega", is_flag=True, help=u"Show Mega Evolution(s) if available.")
 @click.option("-l", "--language", metavar="LANGUAGE", default="en", help=u"Pokédex language to use.")
 @click.option("-pv", "--pokedex-version", metavar="VERSION", default="x", help=u"Pokédex version to use.")
 @click.option("-f", "--format", metavar="FORMAT", default="card", type=click.Choice(formats.format_names), help="Output format (can be %s)." % ", ".join(formats.format_names))
-def pokedex(pokemon, shiny, mega, language, pokedex_version, format):
-    """Command-line interface for a quick Pokédex reference.
+@click.option("--from-file", type=click.File("r"), help=u"Read more Pokémon (one per line) from a file, - for stdin.")
+@click.option("--truecolor/--no-truecolor", default=None, help="Use 24-bit colors (default: detected from COLORTERM).")
+@click.option("--profile", is_flag=True, help="Print time spent per stage to stderr on exit.")
+def show(pokemon, shiny, mega, language, pokedex_version, format, from_file, truecolor, profile):
+    """Show Pokémon in the chosen output format.
 
-    Positional argument POKEMON can be either an id or a name, which has to be
-    specified in the configured language.
+    Positional arguments POKEMON can be ids, names (in the configured
+    language) or ranges of ids such as 1-151.
     """
+    arguments = read_pokemon(pokemon, from_file)
+    if not arguments:
+        raise click.UsageError("Missing argument 'POKEMON...'.")
+
+    from .graphics.colors import truecolor_enabled, use_truecolor
+    if truecolor is not None:
+        use_truecolor(truecolor)
+
+    from . import trace
+    if profile:
+        trace.enable()
+    from .daemon import forward
+    # A profile of the daemon's work would be empty here, render locally
+    forwarded = None if trace.enabled else forward({"pokemon": arguments, "shiny": shiny, "mega": mega, "language": language,
+                         "version": pokedex_version, "format": format, "truecolor": truecolor_enabled()})
+    if forwarded is not None:
+        sys.exit(0 if forwarded else 1)
+
+    from .database.get import download_database
     download_database()
+    show_pokemon(arguments, shiny, mega, language, pokedex_version, format)
+
+
+def show_pokemon(arguments, shiny=False, mega=False, language="en", version="x", format="card"):
+    """Print every Pokémon in arguments to stdout"""
     from .pokemon import Pokemon
+    from .trace import span
+
+    for item in expand_pokemon(arguments):
+        pkmn = Pokemon(item, language=language, version=version)
+        if format == "card":
+            formats.card(pkmn, shiny=shiny, mega=mega)
+        elif format == "page":
+            pass
+        else:
+            with span("write"):
+                getattr(formats, format)(pkmn)
+        sys.stdout.flush()
+
+
+@pokedex.command()
+@click.argument("pokemon", nargs=-1, shell_complete=complete_pokemon)
+@click.option("-o", "--output", metavar="FILE", help="Write to FILE instead of stdout.")
+@click.option("-z", "--gzip", "compress", is_flag=True, help="Gzip the output (implied by a .gz FILE).")
+@click.option("-f", "--format", type=click.Choice(["ndjson", "csv", "columnar"]), help="Output format (default: from the FILE extension, .csv or .pkcol, else ndjson).")
+@click.option("--from-file", type=click.File("r"), help=u"Read more Pokémon (one per line) from a file, - for stdin.")
+def export(pokemon, output, compress, format, from_file):
+    """Stream the Pokédex as newline-delimited JSON, CSV or columnar binary.
+
+    Exports every Pokémon, or only the POKEMON ids, names or ranges given.
+    CSV and columnar exports have one row per Pokémon with its types,
+    genus, height, weight, evolution chain id and the damage multiplier of
+    every attacking type.
+    """
+    from .database.get import download_database
+    from .export import iter_records, export_format, WRITERS
+
+    download_database()
+    arguments = read_pokemon(pokemon, from_file)
+    records = iter_records(list(expand_pokemon(arguments)) if arguments else None)
+    compress = compress or (output is not None and output.endswith(".gz"))
+    WRITERS[export_format(output, format)](output or sys.stdout.buffer, records, compress=compress)
+
+
+def split_types(values):
+    return [name.strip() for value in values for name in value.split(",") if name.strip()]
 
-    pkmn = Pokemon(pokemon, language=language, version=pokedex_version)
-    if format == "card":
-        formats.card(pkmn, shiny=shiny, mega=mega)
-    elif format == "page":
-        pass
+
+@pokedex.command()
+@click.option("-t", "--type", "types", multiple=True, metavar="TYPE", help="Has every TYPE (repeat or comma-separate).")
+@click.option("--any-type", multiple=True, metavar="TYPE", help="Has at least one of the TYPEs.")
+@click.option("-w", "--weak-to", multiple=True, metavar="TYPE", help="Takes more than normal damage from every TYPE.")
+@click.option("-r", "--resists", multiple=True, metavar="TYPE", help="Takes less than normal damage from every TYPE.")
+@click.option("-n", "--number", metavar="RANGE", help="Dex numbers, like 1..151.")
+@click.option("--height", metavar="RANGE", help="Height in m, like >2, <=0.5 or 1..2.")
+@click.option("--weight", metavar="RANGE", help="Weight in kg, like >100 or 10..20.")
+@click.option("--sort", metavar="KEY", default="number", show_default=True, help="number, name, height or weight, - first for descending.")
+@click.option("--limit", type=click.IntRange(min=0), help="Show at most this many.")
+@click.option("-c", "--count", is_flag=True, help="Only print how many match.")
+@click.option("-f", "--format", metavar="FORMAT", default="line", type=click.Choice(formats.format_names), help="Output format (can be %s)." % ", ".join(formats.format_names))
+def query(types, any_type, weak_to, resists, number, height, weight, sort, limit, count, format):
+    """Find Pokémon by type, weakness, number, height and weight.
+
+    All the given conditions must hold, for example:
+
+    \b
+    pokedex query -t water --weight '>100' -w electric --sort -weight
+    """
+    from .database.get import download_database
+    from .database.table import select, parse_range, SCALES
+
+    download_database()
+    try:
+        ranges = {column: parse_range(text, SCALES[column])
+                  for column, text in (("number", number), ("height", height), ("weight", weight)) if text}
+        numbers = select(types=split_types(types), any_type=split_types(any_type), weak_to=split_types(weak_to),
+                         resists=split_types(resists), order=sort, limit=limit, **ranges)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    if count:
+        click.echo(len(numbers))
     else:
-        getattr(formats, format)(pkmn)
+        show_pokemon([str(n) for n in numbers], format=format)
+
+
+@pokedex.command()
+@click.argument("pokemon", required=False, shell_complete=complete_pokemon)
+@click.option("-s", "--shiny", is_flag=True, help=u"Show shiny versions of the Pokémon.")
+def browse(pokemon, shiny):
+    """Step through the Pokédex interactively, starting at POKEMON."""
+    from .database.get import download_database
+    from .browse import browse
+
+    download_database()
+    browse(pokemon, shiny=shiny)
+
+
+@pokedex.command()
+def sync():
+    """Download the Pokédex, or complete the local one.
+
+    Resumes an interrupted download and fetches the evolution chains of
+    Pokémon saved without their evolutions, which are shown as unknown
+    until then.
+    """
+    from .database.get import download_database, backfill_evolutions
+
+    download_database()
+    failed = backfill_evolutions()
+    if failed:
+        raise click.ClickException("Could not download evolution chains %s, run again to retry."
+                                   % ", ".join(map(str, failed)))
+
+
+@pokedex.command()
+@click.option("--socket", "path", metavar="PATH", help="Listen on PATH (default: $POKEDEX_SOCKET or a per-user socket).")
+@click.option("--stop", is_flag=True, help="Stop the running daemon.")
+def daemon(path, stop):
+    """Keep the Pokédex loaded and answer lookups over a Unix socket.
+
+    While it runs, pokedex show forwards its requests to the daemon instead
+    of loading everything itself.
+    """
+    from . import daemon
+
+    if stop:
+        if not daemon.stop(path):
+            raise click.ClickException("No daemon is running.")
+        return
+    try:
+        daemon.serve(path)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+
+@pokedex.command()
+@click.option("--host", default="127.0.0.1", show_default=True, help="Address to listen on.")
+@click.option("-p", "--port", default=8080, show_default=True, help="Port to listen on.")
+def serve(host, port):
+    """Serve the local Pokédex as a JSON API over HTTP.
+
+    Endpoints: /pokemon/{id|name}, /types/{type[,type]}/weaknesses and
+    /search?q=PREFIX.
+    """
+    from .database.get import download_database
+    from .server import serve
+
+    download_database()
+    serve(host, port, ready=lambda server: click.echo("Serving on http://%s:%d" % (host, port), err=True))
 
 if __name__ == "__main__":
     pokedex()
@@ -0,0 +1,286 @@
+# -*- encoding: utf-8 -*-
+
+"""Local stand-in for PokeAPI and the sprite hosts.
+
+Serves the endpoints the CLI uses:
+
+    GET /api/v2/pokemon/{id|name}
+    GET /api/v2/pokemon-species/{id}
+    GET /api/v2/evolution-chain/{id}
+    GET /sprites/{id}.png
+
+Responses are replayed from a recordings directory (see record()) or,
+without one, rebuilt from the local pokedex.json and icons. Every response
+can be delayed (--latency, --jitter) and a fraction of them replaced by
+errors (--error-rate), seeded so runs are repeatable. Documents carry an
+ETag and If-None-Match is answered with 304 Not Modified, so the response
+cache revalidates against it as it would against PokeAPI. Point the CLI at
+it with the environment printed on start-up:
+
+    python -m pokedex.mock_server [--port 8765] [--latency MS] [--error-rate 0.05]
+    python -m pokedex.mock_server record DIRECTORY [POKEMON...]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from . import resource_path
+
+API_PREFIX = "/api/v2"
+ICONS_DIR = os.path.join(resource_path, "icons")
+RECORDED_API = "https://pokeapi.co/api/v2"
+ERROR_STATUSES = (500, 503)
+
+
+def pokemon_document(record, base_url):
+    return {
+        "id": record["id"],
+        "name": record["name"],
+        "height": record["height"],
+        "weight": record["weight"],
+        "types": [{"slot": i + 1, "type": {"name": name}} for i, name in enumerate(record["types"])],
+        "species": {"name": record["name"], "url": "%s/pokemon-species/%d/" % (base_url, record["id"])},
+    }
+
+
+def species_document(record, chain, parent, base_url):
+    """parent is 0 for a base stage, None leaves evolves_from_species out (unknown)"""
+    document = {
+        "id": record["id"],
+        "name": record["name"],
+        "genera": [{"genus": record["genus"], "language": {"name": "en"}}],
+        "flavor_text_entries": [{"flavor_text": record["flavor_text"], "language": {"name": "en"}}],
+        "evolution_chain": {"url": "%s/evolution-chain/%d/" % (base_url, chain)} if chain else None,
+    }
+    if parent is not None:
+        document["evolves_from_species"] = (
+            {"url": "%s/pokemon-species/%d/" % (base_url, parent)} if parent else None)
+    return document
+
+
+def chain_document(graph, chain, base_url):
+    def node(number):
+        return {"species": {"name": graph.names[number].lower(),
+                            "url": "%s/pokemon-species/%d/" % (base_url, number)},
+                "evolves_to": [node(child) for child in graph.children(number)]}
+
+    members = graph.members[graph.chain_start[chain]:graph.chain_start[chain + 1]]
+    if not members or not graph.resolved[members[0]]:
+        return None  # Evolutions unknown locally, answered with a 404
+    roots = [number for number in members if not graph.parents[number]]
+    return {"id": chain, "chain": node(roots[0])} if roots else None
+
+
+class Documents(object):
+    """Response bodies by path, built once at start-up"""
+
+    def __init__(self, base_url, recordings=None):
+        self.bodies = {}  # path -> (content type, body)
+        self.names = {}  # name -> number
+        if recordings:
+            self.load_recordings(recordings, base_url)
+        else:
+            self.load_local(base_url)
+
+    def add(self, path, document):
+        self.bodies[path] = ("application/json", json.dumps(document).encode("utf-8"))
+
+    def load_local(self, base_url):
+        from .database.store import load_records
+        from .database.evolution import get_graph
+        from .database.index import _chain_id
+
+        records = load_records()
+        graph = get_graph()
+        for number, record in records.items():
+            chain = _chain_id(record["evolution_chain"])
+            self.add("%s/pokemon/%d" % (API_PREFIX, number), pokemon_document(record, base_url))
+            # Parents as the evolution graph resolved them, like the chain documents
+            parent = graph.parents[number] if graph.resolved[number] else None
+            self.add("%s/pokemon-species/%d" % (API_PREFIX, number),
+                     species_document(record, chain, parent, base_url))
+            self.names[record["name"].lower()] = number
+            if chain and "%s/evolution-chain/%d" % (API_PREFIX, chain) not in self.bodies:
+                document = chain_document(graph, chain, base_url)
+                if document is not None:
+                    self.add("%s/evolution-chain/%d" % (API_PREFIX, chain), document)
+        for name in os.listdir(ICONS_DIR) if os.path.isdir(ICONS_DIR) else ():
+            if name.startswith("icon") and name[4:-4].isdigit() and name.endswith(".png"):
+                with open(os.path.join(ICONS_DIR, name), "rb") as f:
+                    self.bodies["/sprites/%d.png" % int(name[4:-4])] = ("image/png", f.read())
+
+    def load_recordings(self, directory, base_url):
+        """Files under directory are named after their path (see record()),
+        links to the recorded API are rewritten to point here"""
+        recorded = RECORDED_API.encode("utf-8")
+        for root, _, files in os.walk(directory):
+            for name in files:
+                path = os.path.join(root, name)
+                target = "/" + os.path.relpath(path, directory).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    body = f.read()
+                if target.endswith(".json"):
+                    target = target[:-len(".json")]
+                    body = body.replace(recorded, base_url.encode("utf-8"))
+                    if target.startswith(API_PREFIX + "/pokemon/"):
+                        self.names[json.loads(body)["name"]] = int(target.rsplit("/", 1)[1])
+                    self.bodies[target] = ("application/json", body)
+                else:
+                    self.bodies[target] = ("image/png", body)
+
+    def get(self, path):
+        path = path.split("?", 1)[0].rstrip("/")
+        head, _, key = path.rpartition("/")
+        if head == API_PREFIX + "/pokemon" and key.lower() in self.names:
+            path = "%s/%d" % (head, self.names[key.lower()])
+        return self.bodies.get(path)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "PokeAPIMock"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            delay = server.latency + server.jitter * server.random.random()
+            failing = server.random.random() < server.error_rate
+            if failing:
+                server.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failing:
+            status, content_type, body = server.random.choice(server.error_statuses), "text/plain", b"Injected error"
+        else:
+            found = server.documents.get(self.path)
+            status, (content_type, body) = (200, found) if found else (404, ("text/plain", b"Not Found"))
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16] if status == 200 else None
+        if etag is not None and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, recordings=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 error_statuses=ERROR_STATUSES, seed=None, verbose=False):
+        ThreadingHTTPServer.__init__(self, address, MockHandler)
+        host, port = self.server_address[:2]
+        self.url = "http://%s:%d" % (host, port)
+        self.base_url = self.url + API_PREFIX
+        self.documents = Documents(self.base_url, recordings)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self.random = random.Random(seed)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def environment(self):
+        """Variables pointing the CLI at this server"""
+        return {"POKEDEX_API_URL": self.base_url, "POKEDEX_SPRITE_URLS": self.url + "/sprites/{number}.png"}
+
+
+def start(host="127.0.0.1", port=0, **options):
+    """Run a MockServer on a background thread, stop it with shutdown()"""
+    server = MockServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def record(directory, pokemon, base_url=RECORDED_API):
+    """Save PokeAPI responses (and sprites) of the given numbers for replay"""
+    from .database.store import fetch
+    from .sprites import fetch_sprite
+
+    def save(target, body):
+        path = os.path.join(directory, *target.strip("/").split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(body)
+
+    for number in pokemon:
+        pokemon_response = fetch("%s/pokemon/%d" % (base_url, number))
+        if pokemon_response.status_code != 200:
+            print("No Pokémon #%d" % number, file=sys.stderr)
+            continue
+        save("%s/pokemon/%d.json" % (API_PREFIX, number), pokemon_response.content)
+        species_response = fetch("%s/pokemon-species/%d" % (base_url, number))
+        if species_response.status_code == 200:
+            save("%s/pokemon-species/%d.json" % (API_PREFIX, number), species_response.content)
+            chain_url = (species_response.json().get("evolution_chain") or {}).get("url")
+            if chain_url:
+                chain = chain_url.rstrip("/").rsplit("/", 1)[1]
+                save("%s/evolution-chain/%s.json" % (API_PREFIX, chain), fetch(chain_url).content)
+        sprite = fetch_sprite(number, pokemon_response.json()["name"])
+        if sprite is not None:
+            save("/sprites/%d.png" % number, sprite)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["record"]:
+        parser = argparse.ArgumentParser(prog="python -m pokedex.mock_server record",
+                                         description="Record PokeAPI responses for replay.")
+        parser.add_argument("directory")
+        parser.add_argument("pokemon", nargs="*", type=int, help="Dex numbers (default: 1 to 151).")
+        args = parser.parse_args(argv[1:])
+        record(args.directory, args.pokemon or range(1, 152))
+        return 0
+
+    parser = argparse.ArgumentParser(prog="python -m pokedex.mock_server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--recordings", metavar="DIRECTORY", help="Replay these instead of the local database.")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="MS", help="Delay of every response.")
+    parser.add_argument("--jitter", type=float, default=0.0, metavar="MS", help="Random extra delay, up to MS.")
+    parser.add_argument("--error-rate", type=float, default=0.0, metavar="FRACTION",
+                        help="Answer this fraction of requests with an error status.")
+    parser.add_argument("--error-status", type=int, action="append", metavar="STATUS",
+                        help="Status of injected errors, repeatable (default: 500 and 503).")
+    parser.add_argument("--seed", type=int, help="Seed of the latency and error draws.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args(argv)
+
+    server = MockServer((args.host, args.port), recordings=args.recordings, latency=args.latency / 1e3,
+                        jitter=args.jitter / 1e3, error_rate=args.error_rate,
+                        error_statuses=tuple(args.error_status or ERROR_STATUSES), seed=args.seed,
+                        verbose=args.verbose)
+    print("Serving %d responses on %s" % (len(server.documents.bodies), server.url), file=sys.stderr)
+    for name, value in server.environment().items():
+        print("export %s='%s'" % (name, value))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("%d requests, %d injected errors" % (server.requests, server.errors), file=sys.stderr)
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,110 +2,79 @@
 
 import os
 import logging
-import requests
 
 from .exceptions import *
 from .database.queries import *
 from .database.get import *
+from .database.search import get_index, suggest
+from .database.store import find_record, get_record, get_chain, fetch_species_text, is_offline
+from .database.evolution import get_graph
+from .trace import traced
 
 class Pokemon(object):
+    @traced("data")
     def __init__(self, pokemon, language=default_language, version=default_version):
         try:
-            # Coba cari Pokemon di PokeAPI
-            if isinstance(pokemon, str):
-                pokemon_name = pokemon.lower()
-                response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{pokemon_name}")
-            else:
-                response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{pokemon}")
+            # Local database first, PokeAPI only for records we don't have yet
+            record = find_record(pokemon)
+            if record is None:
+                # Other spellings and languages before asking PokeAPI
+                number = get_index().exact(str(pokemon))
+                try:
+                    record = find_record(number) if number else get_record(pokemon)
+                except OSError:
+                    record = None  # Offline
+            if record is None:
+                raise NoSuchPokemon(pokemon, suggest(str(pokemon)))
 
-            if response.status_code == 200:
-                pokemon_data = response.json()
-                species_response = requests.get(pokemon_data['species']['url'])
-                species_data = species_response.json() if species_response.status_code == 200 else {}
+            self.number = record['id']
+            self.name = record['name'].capitalize()
+            self.types = list(record['types'])
+            self.height = record['height']
+            self.weight = record['weight']
+            self.genus = record['genus'] or "??? Pokémon"
+            self.flavor = record['flavor_text']
 
-                self.number = pokemon_data['id']
-                self.name = pokemon_data['name'].capitalize()
-                self.types = [t['type']['name'] for t in pokemon_data['types']]
-                self.height = pokemon_data['height'] * 10
-                self.weight = pokemon_data['weight'] * 100
-                self.genus = next((g['genus'] for g in species_data.get('genera', []) 
-                                 if g['language']['name'] == language), "??? Pokémon")
-                self.flavor = next((f['flavor_text'].replace('\n', ' ').replace('\f', ' ') 
-                                  for f in species_data.get('flavor_text_entries', [])
-                                  if f['language']['name'] == language), "")
+            if language != "en":
+                try:
+                    genus, flavor = fetch_species_text(self.number, language) or (None, None)
+                    self.genus = genus or self.genus
+                    self.flavor = flavor or self.flavor
+                except Exception as e:
+                    logging.error(f"Error downloading {language} species text for #{self.number}: {str(e)}")
 
-                # Calculate weaknesses
-                self.weaknesses = get_pokemon_weakness(self.types)
+            self.flavor = self.flavor.replace('\n', ' ').replace('\f', ' ')
 
-                # Download sprite if not exists
-                icon_path = os.path.join(resource_path, f"icons/icon{self.number:03d}.png")
-                if not os.path.exists(os.path.dirname(icon_path)):
-                    os.makedirs(os.path.dirname(icon_path))
-                
-                if not os.path.exists(icon_path):
-                    # Gunakan sprite dari PokemonDB dengan style yang berbeda
-                    sprite_urls = [
-                        # Black & White sprites yang memiliki gaya pixel art yang bagus
-                        f"https://img.pokemondb.net/sprites/black-white/normal/{pokemon_data['name'].lower()}.png",
-                        # Fallback ke style lain
-                        f"https://img.pokemondb.net/sprites/black-white/anim/normal/{pokemon_data['name'].lower()}.gif",
-                        f"https://img.pokemondb.net/sprites/x-y/normal/{pokemon_data['name'].lower()}.png",
-                        # Fallback terakhir ke sprite default
-                        f"https://img.pokemondb.net/sprites/home/normal/{pokemon_data['name'].lower()}.png"
-                    ]
-                    
-                    for sprite_url in sprite_urls:
-                        if not sprite_url:
-                            continue
-                        try:
-                            sprite_response = requests.get(sprite_url)
-                            if sprite_response.status_code == 200:
-                                with open(icon_path, 'wb') as f:
-                                    f.write(sprite_response.content)
-                                break
-                        except Exception as e:
-                            logging.error(f"Error downloading sprite from {sprite_url}: {str(e)}")
-                            continue
+            # Calculate weaknesses
+            self.weaknesses = get_pokemon_weakness(self.types)
 
-                # Get evolution chain
-                if 'evolution_chain' in species_data:
-                    evo_response = requests.get(species_data['evolution_chain']['url'])
-                    if evo_response.status_code == 200:
-                        self.chain = self._process_evolution_chain(evo_response.json()['chain'])
-                    else:
-                        self.chain = {(self.number, self.name): {}}
-                else:
-                    self.chain = {(self.number, self.name): {}}
+            # Download sprite if not exists
+            icon_path = os.path.join(resource_path, f"icons/icon{self.number:03d}.png")
+            if not os.path.exists(icon_path) and not is_offline():
+                from .sprites import download_icon
+                download_icon(self.number, record['name'], os.path.dirname(icon_path))
 
-            else:
-                raise NoSuchPokemon(pokemon)
+            self.chain = get_chain(record)
+            graph = get_graph()
+            stages = lambda numbers: None if numbers is None else [(n, graph.names[n]) for n in numbers]
+            self.family = stages(graph.family(self.number)) if graph.resolved[self.number] else None
+            self.ancestors = stages(graph.ancestors(self.number))
+            self.descendants = stages(graph.descendants(self.number))
 
         except Exception as e:
             self.number = 0
             self.name = "MISSINGNO."
             self.genus = "???"
-            self.flavor = f"Pokémon {pokemon} not found"
+            self.flavor = str(e) if isinstance(e, NoSuchPokemon) else f"Pokémon {pokemon} not found"
             self.types = ["flying", "normal"]
             self.weaknesses = []
             self.chain = {(0, "MISSINGNO."): {}}
+            self.family = [(0, "MISSINGNO.")]
+            self.ancestors = []
+            self.descendants = []
             self.height = 10
             self.weight = 100
 
-    def _process_evolution_chain(self, chain_data):
-        """Process evolution chain data from PokeAPI"""
-        result = {}
-        species_name = chain_data['species']['name']
-        species_url = chain_data['species']['url']
-        species_id = int(species_url.split('/')[-2])
-        
-        current = (species_id, species_name.capitalize())
-        result[current] = {}
-        
-        for evolution in chain_data.get('evolves_to', []):
-            result[current].update(self._process_evolution_chain(evolution))
-        
-        return result
-
     def icon(self, shiny=False, mega=0):
         # Untuk sementara kita hanya mendukung icon normal (tidak shiny/mega)
         return f"icons/icon{self.number:03d}.png"
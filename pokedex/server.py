@@ -0,0 +1,191 @@
+# -*- encoding: utf-8 -*-
+
+"""HTTP JSON API over the local Pokédex.
+
+    GET /pokemon/{id|name}
+    GET /types/{type[,type]}/weaknesses
+    GET /search?q=PREFIX[&limit=N]
+
+Every record is serialized once at start-up. Other answers are cached in
+memory after the first request. Responses carry an ETag, and a matching
+If-None-Match gets a bodiless 304. Connections are kept alive (HTTP/1.1).
+"""
+
+import json
+import zlib
+import asyncio
+import collections
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from .database.search import get_index, suggest
+from .database.store import find_record
+from .database import type_chart
+from .exceptions import NoSuchPokemon
+from .export import iter_records, export_record
+
+MAX_CACHED = 4096
+MAX_HEADER_LINES = 100
+SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100  # Larger limits are clamped
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+# head holds the status line and headers, ready to write
+Response = collections.namedtuple("Response", "status etag head body")
+
+
+def make_response(status, document):
+    body = json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = '"%08x"' % zlib.crc32(body)
+    head = ("HTTP/1.1 %d %s\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            "Content-Length: %d\r\n"
+            "ETag: %s\r\n"
+            "\r\n" % (status, REASONS[status], len(body), etag)).encode("ascii")
+    return Response(status, etag, head, body)
+
+
+def not_modified(etag):
+    return ("HTTP/1.1 304 Not Modified\r\nETag: %s\r\n\r\n" % etag).encode("ascii")
+
+
+def error(status, message, **extra):
+    return make_response(status, dict(error=message, **extra))
+
+
+class ApiServer(object):
+    """Routes and caches API requests"""
+
+    def __init__(self, max_cached=MAX_CACHED):
+        self.pokemon = {record["id"]: make_response(200, export_record(record)) for record in iter_records()}
+        self.cache = collections.OrderedDict()  # path -> Response, least recently used first
+        self.max_cached = max_cached
+
+    def respond(self, target):
+        response = self.cache.get(target)
+        if response is not None:
+            self.cache.move_to_end(target)
+            return response
+        response = self.route(target)
+        if response.status in (200, 404):
+            self.cache[target] = response
+            if len(self.cache) > self.max_cached:
+                self.cache.popitem(last=False)
+        return response
+
+    def route(self, target):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        if len(parts) == 2 and parts[0] == "pokemon":
+            return self.get_pokemon(parts[1])
+        if len(parts) == 3 and parts[0] == "types" and parts[2] == "weaknesses":
+            return self.get_weaknesses(parts[1].split(","))
+        if parts == ["search"]:
+            query = parse_qs(url.query)
+            try:
+                limit = int(query.get("limit", [SEARCH_LIMIT])[0])
+            except ValueError:
+                limit = 0
+            if limit < 1:
+                return error(400, "limit must be a positive integer")
+            return self.search(query.get("q", [""])[0], min(limit, MAX_SEARCH_LIMIT))
+        return error(404, "No such endpoint: %s" % url.path)
+
+    def get_pokemon(self, pokemon):
+        # str.isdigit() also accepts digits int() rejects, like superscripts
+        number = int(pokemon) if pokemon.isascii() and pokemon.isdecimal() else get_index().exact(pokemon)
+        if number is None:
+            record = find_record(pokemon)
+            number = record["id"] if record else None
+        response = self.pokemon.get(number) if number is not None else None
+        if response is None:
+            suggestions = suggest(pokemon)
+            return error(404, str(NoSuchPokemon(pokemon, suggestions)), suggestions=suggestions)
+        return response
+
+    def get_weaknesses(self, types):
+        types = [t.lower() for t in types]
+        unknown = [t for t in types if t not in type_chart.TYPE_INDEX]
+        if unknown or not 1 <= len(types) <= 2:
+            return error(404, "Unknown type combination: %s" % ",".join(types))
+        return make_response(200, {
+            "types": types,
+            "weaknesses": type_chart.weaknesses(types),
+            "multipliers": type_chart.multipliers(types),
+        })
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        index = get_index()
+        names = index.complete(query, limit=limit)
+        if names:
+            results = [{"number": index.exact(name), "name": name} for name in names]
+        else:
+            results = [{"number": number, "name": name} for name, number in index.suggest(query, limit=limit)]
+        return make_response(200, {"query": query, "results": results})
+
+    async def handle(self, reader, writer):
+        """Serve requests on one connection until either side closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    response = error(400, "Malformed request line")
+                    writer.write(response.head.replace(b"\r\n\r\n", b"\r\nConnection: close\r\n\r\n", 1) + response.body)
+                    break
+
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get("content-length", "0") != "0":
+                    response = error(400, "Request bodies are not supported")
+                elif method not in ("GET", "HEAD"):
+                    response = error(405, "Only GET and HEAD are supported")
+                else:
+                    response = self.respond(target)
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+                if response.status == 200 and headers.get("if-none-match") == response.etag:
+                    data = not_modified(response.etag)
+                else:
+                    data = response.head if method == "HEAD" else response.head + response.body
+                keep_alive = keep_alive and response.status != 400
+                if not keep_alive:
+                    data = data.replace(b"\r\n\r\n", b"\r\nConnection: close\r\n\r\n", 1)
+                elif version == "HTTP/1.0":
+                    data = data.replace(b"\r\n\r\n", b"\r\nConnection: keep-alive\r\n\r\n", 1)
+                writer.write(data)
+
+                if not keep_alive:
+                    break
+                await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(host, port, ready=None):
+    api = ApiServer()
+    server = await asyncio.start_server(api.handle, host, port, reuse_address=True)
+    if ready is not None:
+        ready(server)
+    async with server:
+        await server.serve_forever()
+
+
+def serve(host="127.0.0.1", port=8080, ready=None):
+    """Run the API until interrupted"""
+    try:
+        asyncio.run(_serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
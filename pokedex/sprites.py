@@ -0,0 +1,240 @@
+# -*- encoding: utf-8 -*-
+
+"""Sprite pipeline: parallel download, normalization and atomic writes.
+
+Downloads are I/O bound and run on a thread pool sharing pooled sessions.
+Normalizing (cropping, nearest-neighbour scaling, binarized transparency)
+is CPU bound and runs on a process pool with Pillow, so a full refresh of
+the icons is limited by CPU rather than network latency.
+
+    python -m pokedex.sprites download [--force] [--workers N] [--processes N]
+    python -m pokedex.sprites normalize FILE... [-o DIRECTORY]
+"""
+
+import io
+import os
+import sys
+import logging
+import argparse
+
+from . import resource_path
+
+ICONS_DIR = os.path.join(resource_path, "icons")
+ICON_SIZE = 32
+ALPHA_THRESHOLD = 128
+DOWNLOAD_WORKERS = 16
+
+# Sprite sources in order of preference, {number} and {name} are filled in.
+# POKEDEX_SPRITE_URLS replaces them with its own comma-separated templates.
+SPRITE_URLS = [
+    "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{number}.png",
+    "https://play.pokemonshowdown.com/sprites/gen5/{name}.png",
+    "https://img.pokemondb.net/sprites/black-white/normal/{name}.png",
+    "https://img.pokemondb.net/sprites/home/normal/{name}.png",
+]
+if os.environ.get("POKEDEX_SPRITE_URLS"):
+    SPRITE_URLS = [url.strip() for url in os.environ["POKEDEX_SPRITE_URLS"].split(",") if url.strip()]
+
+
+def sprite_urls(number, name):
+    """Sources of a Pokémon's sprite, in order of preference"""
+    return [url.format(number=number, name=name.lower()) for url in SPRITE_URLS]
+
+
+def icon_path(number, icons_dir=ICONS_DIR):
+    return os.path.join(icons_dir, f"icon{number:03d}.png")
+
+
+def write_atomic(path, data):
+    """Write through a temporary file, readers never see a partial icon"""
+    tmp_path = "%s.%d.part" % (path, os.getpid())
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def normalize_icon(data, size=ICON_SIZE):
+    """Normalize an encoded sprite into a size x size RGBA PNG (needs Pillow).
+
+    Only the first frame (and the left half of two-frame icon sheets) is
+    kept. Transparency is binarized, fully transparent pixels are black.
+    The sprite is cropped to its opaque pixels, scaled down by a whole
+    factor with nearest neighbour and centered.
+    """
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(data))
+    image.seek(0)
+    image = image.convert("RGBA")
+    if image.width == 2 * image.height:
+        image = image.crop((0, 0, image.height, image.height))
+
+    alpha = image.getchannel("A").point(lambda a: 255 if a >= ALPHA_THRESHOLD else 0)
+    black = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    image = Image.composite(image, black, alpha)
+    image.putalpha(alpha)
+
+    box = alpha.getbbox()
+    if box is not None:
+        image = image.crop(box)
+
+    factor = -(-max(image.size) // size)  # Ceiling division
+    if factor > 1:
+        image = image.resize((max(1, image.width // factor), max(1, image.height // factor)), Image.NEAREST)
+
+    canvas = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    canvas.paste(image, ((size - image.width) // 2, (size - image.height) // 2))
+    output = io.BytesIO()
+    canvas.save(output, "PNG", optimize=True)
+    return output.getvalue()
+
+
+def normalize_file(source, target=None):
+    """Normalize one sprite file (in place without target), runs in the process pool"""
+    with open(source, "rb") as f:
+        data = normalize_icon(f.read())
+    write_atomic(target or source, data)
+    return target or source
+
+
+def fetch_sprite(number, name, session=None):
+    """Encoded sprite of a Pokémon from the first source that has it, or None.
+
+    Without a session, requests go through store.fetch, which stops trying
+    once the network turned out to be unreachable.
+    """
+    from .database.cache import cached_get
+    from .database.store import fetch
+
+    for url in sprite_urls(number, name):
+        try:
+            response = cached_get(url, session=session) if session is not None else fetch(url)
+        except OSError as e:
+            logging.info(f"Error downloading sprite from {url}: {str(e)}")
+            continue
+        if response.status_code == 200:
+            return response.content
+    return None
+
+
+def download_icon(number, name, icons_dir=ICONS_DIR):
+    """Fetch, normalize and store a single icon in this process, returns its path or None"""
+    data = fetch_sprite(number, name)
+    if data is None:
+        return None
+    os.makedirs(icons_dir, exist_ok=True)
+    path = icon_path(number, icons_dir)
+    write_atomic(path, normalize_icon(data))
+    return path
+
+
+def _fetch_raw(number, name, icons_dir):
+    """Thread pool job: download a sprite next to its final path"""
+    from .database.get import _session
+
+    data = fetch_sprite(number, name, session=_session())
+    if data is None:
+        return None
+    raw_path = icon_path(number, icons_dir) + ".raw"
+    write_atomic(raw_path, data)
+    return raw_path
+
+
+def _normalize_raw(raw_path):
+    """Process pool job: normalize a downloaded sprite into its icon"""
+    target = raw_path[:-len(".raw")]
+    try:
+        return normalize_file(raw_path, target)
+    finally:
+        os.remove(raw_path)
+
+
+def refresh_icons(pokemon, icons_dir=ICONS_DIR, workers=DOWNLOAD_WORKERS, processes=None, force=False):
+    """Download and normalize the icons of (number, name) pairs.
+
+    Existing icons are kept unless force is set. Every finished download is
+    handed to the process pool right away, so normalizing overlaps with the
+    downloads still in flight. A sprite atlas of icons_dir is rebuilt
+    afterwards. Returns the numbers that failed.
+    """
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+    os.makedirs(icons_dir, exist_ok=True)
+    pending = [(number, name) for number, name in pokemon
+               if force or not os.path.exists(icon_path(number, icons_dir))]
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as downloads, \
+            ProcessPoolExecutor(max_workers=processes) as normalizing:
+        fetches = {downloads.submit(_fetch_raw, number, name, icons_dir): number for number, name in pending}
+        jobs = {}
+        for future in as_completed(fetches):
+            number = fetches[future]
+            try:
+                raw_path = future.result()
+            except Exception as e:
+                logging.error(f"Error downloading sprite for #{number}: {str(e)}")
+                raw_path = None
+            if raw_path is None:
+                failed.append(number)
+                continue
+            jobs[normalizing.submit(_normalize_raw, raw_path)] = number
+
+        for future in as_completed(jobs):
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Error normalizing sprite for #{jobs[future]}: {str(e)}")
+                failed.append(jobs[future])
+
+    from .graphics import atlas
+
+    if pending and os.path.abspath(icons_dir) == os.path.abspath(atlas.ICONS_DIR) \
+            and os.path.exists(atlas.atlas_path):
+        atlas.build_atlas(icons_dir)
+    return sorted(failed)
+
+
+def normalize_icons(paths, output_dir=None, processes=None):
+    """Normalize existing sprite files on a process pool, in place or into output_dir"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    targets = [os.path.join(output_dir, os.path.basename(path)) if output_dir else None for path in paths]
+    with ProcessPoolExecutor(max_workers=processes) as normalizing:
+        return list(normalizing.map(normalize_file, paths, targets, chunksize=16))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pokedex.sprites", description="Download or normalize sprites.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    download = commands.add_parser("download", help="Fetch and normalize the icon of every local Pokémon.")
+    download.add_argument("--force", action="store_true", help="Replace existing icons too.")
+    download.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS)
+    download.add_argument("--processes", type=int)
+    download.add_argument("--icons-dir", default=ICONS_DIR)
+
+    normalize = commands.add_parser("normalize", help="Normalize sprite files.")
+    normalize.add_argument("files", nargs="+")
+    normalize.add_argument("-o", "--output-dir", help="Write here instead of in place.")
+    normalize.add_argument("--processes", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "normalize":
+        print("Normalized %d sprites" % len(normalize_icons(args.files, args.output_dir, args.processes)))
+        return 0
+
+    from .database.store import load_records
+
+    records = load_records()
+    failed = refresh_icons(sorted((number, record["name"]) for number, record in records.items()),
+                           args.icons_dir, args.workers, args.processes, args.force)
+    if failed:
+        print("No sprite for: %s" % ", ".join(map(str, failed)), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# -*- encoding: utf-8 -*-
+
+"""Wall time and call counts per pipeline stage.
+
+Off by default: span() then hands out one shared no-op context manager and
+traced() functions call straight through. Turn it on with
+`pokedex --profile` (summary table on stderr at exit) or POKEDEX_TRACE,
+set to 1 for the table or to a file name for a Chrome trace JSON
+(chrome://tracing, ui.perfetto.dev).
+
+    with span("render"):
+        ...
+"""
+
+import os
+import sys
+import time
+import atexit
+import functools
+import threading
+from contextlib import nullcontext
+
+enabled = False
+trace_path = None
+
+# (stage, start, duration, thread) in perf_counter nanoseconds
+_events = []
+_origin = time.perf_counter_ns()
+_registered = False
+_NULL = nullcontext()
+
+
+class _Span(object):
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        _events.append((self.name, self.start, time.perf_counter_ns() - self.start, threading.get_ident()))
+        return False
+
+
+def span(name):
+    """Context manager timing one stage, free when tracing is off"""
+    return _Span(name) if enabled else _NULL
+
+
+def traced(name):
+    """Decorator timing every call of a function as a stage"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with _Span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def enable(path=None):
+    """Start recording, reporting at exit to stderr or, with path, a Chrome trace"""
+    global enabled, trace_path, _registered
+    enabled = True
+    trace_path = path or trace_path
+    if not _registered:
+        _registered = True
+        atexit.register(report)
+
+
+def summary():
+    """Rows of (stage, calls, total, max) in seconds, slowest stage first"""
+    stages = {}
+    for name, _, duration, _ in _events:
+        calls, total, longest = stages.get(name, (0, 0, 0))
+        stages[name] = (calls + 1, total + duration, max(longest, duration))
+    rows = [(name, calls, total / 1e9, longest / 1e9) for name, (calls, total, longest) in stages.items()]
+    return sorted(rows, key=lambda row: -row[2])
+
+
+def print_summary(stream=sys.stderr):
+    print("%-24s %8s %12s %12s %12s" % ("stage", "calls", "total ms", "mean ms", "max ms"), file=stream)
+    for name, calls, total, longest in summary():
+        print("%-24s %8d %12.3f %12.3f %12.3f" % (name, calls, total * 1e3, total / calls * 1e3, longest * 1e3),
+              file=stream)
+    print("%-24s %8s %12.3f" % ("wall time", "", (time.perf_counter_ns() - _origin) / 1e6), file=stream)
+    print("Stages nest (a card's layout includes its sprite load), so totals overlap.", file=stream)
+
+
+def write_chrome_trace(path):
+    """Write the recorded spans as complete ("X") events of the Chrome trace format"""
+    import json
+
+    pid = os.getpid()
+    events = [{"name": name, "cat": "pokedex", "ph": "X", "pid": pid, "tid": thread,
+               "ts": (start - _origin) / 1e3, "dur": duration / 1e3}
+              for name, start, duration, thread in _events]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def report():
+    if trace_path:
+        write_chrome_trace(trace_path)
+        print("Wrote %d trace events to %s" % (len(_events), trace_path), file=sys.stderr)
+    else:
+        print_summary()
+
+
+_setting = os.environ.get("POKEDEX_TRACE", "")
+if _setting and _setting != "0":
+    enable(None if _setting == "1" else _setting)
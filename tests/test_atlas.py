@@ -0,0 +1,46 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import shutil
+
+import pytest
+
+from pokedex import resource_path
+from pokedex.graphics.atlas import Atlas, build_atlas
+from pokedex.graphics.sprite_cache import quantize_sprite, truecolor_sprite
+
+ICONS = ["icon000", "icon001", "icon006", "icon025", "icon025s", "icon133", "icon150", "icon493", "iconEgg"]
+
+
+@pytest.fixture(scope="module")
+def icons(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("icons")
+    for name in ICONS:
+        shutil.copy(os.path.join(resource_path, "icons", name + ".png"), str(directory))
+    return str(directory)
+
+
+@pytest.fixture(scope="module")
+def atlas(icons, tmp_path_factory):
+    target = str(tmp_path_factory.mktemp("atlas") / "sprites.atlas")
+    assert build_atlas(icons, target) == len(ICONS)
+    return Atlas(target)
+
+
+@pytest.mark.parametrize("name", ICONS)
+def test_sprites_match_the_decoded_icons(atlas, icons, name):
+    path = os.path.join(icons, name + ".png")
+    assert atlas.sprite(name) == quantize_sprite(path)
+    assert atlas.sprite(name, truecolor=True) == truecolor_sprite(path)
+
+
+def test_unknown_names(atlas):
+    assert atlas.find("icon999") is None
+    assert atlas.sprite("icon999") is None
+    assert atlas.sprite("") is None
+    assert atlas.sprite("x" * 40) is None
+
+
+def test_sprites_are_memoized(atlas):
+    assert atlas.sprite("icon025") is atlas.sprite("icon025")
+    assert atlas.sprite("icon025") is not atlas.sprite("icon025", truecolor=True)
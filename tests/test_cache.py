@@ -0,0 +1,112 @@
+# -*- encoding: utf-8 -*-
+
+import os
+
+import pytest
+
+from pokedex import mock_server
+from pokedex.database import cache
+from pokedex.database.cache import HttpCache
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = mock_server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def cache_files(directory):
+    return [os.path.join(root, name) for root, _, files in os.walk(directory) for name in files]
+
+
+def test_fresh_entries_skip_the_network(server, tmp_path):
+    http = HttpCache(str(tmp_path), ttl=3600)
+    url = server.base_url + "/pokemon/25"
+
+    first = http.get(url)
+    requests = server.requests
+    second = http.get(url)
+
+    assert first.status_code == 200 and not first.from_cache
+    assert first.json()["name"] == "pikachu"
+    assert second.from_cache and second.content == first.content
+    assert server.requests == requests
+
+
+def test_expired_entries_are_revalidated_with_their_etag(server, tmp_path):
+    http = HttpCache(str(tmp_path), ttl=0)
+    url = server.base_url + "/pokemon-species/25"
+
+    first = http.get(url)
+    requests = server.requests
+    second = http.get(url)
+
+    # One request answered 304 Not Modified: the body comes from disk
+    assert server.requests == requests + 1
+    assert second.status_code == 200 and second.from_cache
+    assert second.content == first.content
+
+
+def test_changed_documents_replace_expired_entries(server, tmp_path):
+    http = HttpCache(str(tmp_path), ttl=0)
+    path = mock_server.API_PREFIX + "/pokemon/test-changing"
+    url = server.url + path
+
+    server.documents.add(path, {"version": 1})
+    assert http.get(url).json() == {"version": 1}
+    server.documents.add(path, {"version": 2})
+    second = http.get(url)
+    assert not second.from_cache and second.json() == {"version": 2}
+    assert http.get(url).json() == {"version": 2}
+
+
+def test_errors_are_not_cached(server, tmp_path):
+    http = HttpCache(str(tmp_path), ttl=3600)
+    url = server.base_url + "/pokemon/0"
+
+    assert http.get(url).status_code == 404
+    requests = server.requests
+    assert http.get(url).status_code == 404
+    assert server.requests == requests + 1
+    assert cache_files(str(tmp_path)) == []
+
+
+def test_stale_entries_are_served_when_offline(tmp_path):
+    server = mock_server.start()
+    url = server.base_url + "/pokemon/1"
+    http = HttpCache(str(tmp_path), ttl=0)
+    first = http.get(url)
+    server.shutdown()
+    server.server_close()
+
+    second = http.get(url, timeout=1)
+    assert second.from_cache and second.content == first.content
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    http = HttpCache(str(tmp_path), ttl=3600)
+    http.get(server.base_url + "/pokemon/1")
+    size = os.path.getsize(cache_files(str(tmp_path))[0])
+    http = HttpCache(str(tmp_path), ttl=3600, max_bytes=3 * size)
+
+    urls = [server.base_url + "/pokemon/%d" % number for number in range(2, 12)]
+    for url in urls:
+        http.get(url)
+
+    files = cache_files(str(tmp_path))
+    assert sum(os.path.getsize(path) for path in files) <= 3 * size
+    assert 0 < len(files) < len(urls)
+    assert os.path.exists(http._path(urls[-1]))
+    assert not os.path.exists(http._path(urls[0]))
+
+
+def test_configure_replaces_the_shared_cache(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "default_cache", cache.default_cache)
+    cache.configure(str(tmp_path), ttl=3600)
+    url = server.base_url + "/pokemon/4"
+
+    assert not cache.cached_get(url).from_cache
+    assert cache.cached_get(url).from_cache
+    assert len(cache_files(str(tmp_path))) == 1
@@ -0,0 +1,88 @@
+# -*- encoding: utf-8 -*-
+
+import io
+import csv
+import gzip
+import json
+
+import pytest
+
+from pokedex.database.index import database_path
+from pokedex.export import COLUMNS, CHUNK_ROWS, read_columnar, table_rows, write_columnar, write_csv, export_format
+
+
+@pytest.fixture(scope="module")
+def records():
+    with open(database_path) as f:
+        return [record for _, record in sorted((int(k), v) for k, v in json.load(f).items())]
+
+
+def read_rows(stream):
+    rows = []
+    for chunk in read_columnar(stream):
+        assert list(chunk) == [name for name, _ in COLUMNS]
+        rows.extend(zip(*(chunk[name] for name, _ in COLUMNS)))
+    return [list(row) for row in rows]
+
+
+def test_columnar_round_trip(records):
+    assert len(records) > 2 * CHUNK_ROWS  # Several chunks and a partial last one
+    output = io.BytesIO()
+    assert write_columnar(output, records) == len(records)
+    output.seek(0)
+    assert read_rows(output) == list(table_rows(records))
+
+
+def test_columnar_round_trip_gzipped(records):
+    output = io.BytesIO()
+    write_columnar(output, records[:10], compress=True)
+    with gzip.GzipFile(fileobj=io.BytesIO(output.getvalue())) as stream:
+        assert read_rows(stream) == list(table_rows(records[:10]))
+
+
+def test_columnar_empty_export():
+    output = io.BytesIO()
+    assert write_columnar(output, []) == 0
+    output.seek(0)
+    assert list(read_columnar(output)) == []
+
+
+def test_columnar_rejects_other_files():
+    with pytest.raises(ValueError):
+        list(read_columnar(io.BytesIO(b"PK\x03\x04" + bytes(32))))
+
+
+def test_csv_round_trip(records):
+    output = io.BytesIO()
+    assert write_csv(output, records) == len(records)
+    rows = list(csv.reader(io.StringIO(output.getvalue().decode("utf-8"), newline="")))
+    assert rows[0] == [name for name, _ in COLUMNS]
+    assert rows[1:] == [[str(value) for value in row] for row in table_rows(records)]
+
+
+def test_export_format_from_extension():
+    assert export_format("dex.csv") == "csv"
+    assert export_format("dex.pkcol.gz") == "columnar"
+    assert export_format("dex.ndjson") == "ndjson"
+    assert export_format(None) == "ndjson"
+    assert export_format("dex.csv", "ndjson") == "ndjson"
+
+
+def test_unknown_parents_and_families_are_not_base_stages(monkeypatch):
+    from pokedex import export
+    from pokedex.database.evolution import EvolutionGraph
+
+    chain = "https://pokeapi.co/api/v2/evolution-chain/%d/"
+    graph = EvolutionGraph({1: {"name": "bulbasaur", "evolution_chain": chain % 1, "evolves_from": None},
+                            2: {"name": "ivysaur", "evolution_chain": chain % 1, "evolves_from": 1},
+                            4: {"name": "charmander", "evolution_chain": chain % 2}})
+    monkeypatch.setattr(export, "get_graph", lambda: graph)
+    record = lambda number, name, **extra: dict({"id": number, "name": name, "genus": "", "flavor_text": "",
+                                                 "types": ["fire"], "height": 1, "weight": 1,
+                                                 "evolution_chain": chain % number}, **extra)
+
+    base = export.export_record(record(1, "bulbasaur", evolves_from=None))
+    assert base["evolves_from"] is None and base["family"] == [1, 2] and base["ancestors"] == []
+    unknown = export.export_record(record(4, "charmander"))
+    assert "evolves_from" not in unknown
+    assert unknown["family"] is None and unknown["ancestors"] is None and unknown["descendants"] is None
@@ -0,0 +1,63 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import json
+
+import pytest
+
+from pokedex import mock_server
+from pokedex.database import cache, get
+from pokedex.database.store import load_records
+from pokedex.database.index import _chain_id
+
+COUNT = 12
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """A mock PokeAPI failing a fifth of the requests, behind an empty response cache"""
+    monkeypatch.setattr(cache, "default_cache", cache.default_cache)
+    cache.configure(str(tmp_path / "cache"), ttl=3600)
+    server = mock_server.start(error_rate=0.2, seed=7)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def download(server, tmp_path):
+    db_path = str(tmp_path / "pokedex.json")
+    get.download_database(server.base_url, count=COUNT, workers=4, db_path=db_path,
+                          icons_dir=str(tmp_path / "icons"), sprites=False)
+    with open(db_path) as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def expected_records(server):
+    """The local records, as served with chain links to the mock"""
+    records = load_records()
+    return {number: dict(records[number], evolution_chain="%s/evolution-chain/%d/"
+                         % (server.base_url, _chain_id(records[number]["evolution_chain"])))
+            for number in range(1, COUNT + 1)}
+
+
+def test_failed_requests_are_retried(server, tmp_path):
+    assert download(server, tmp_path) == expected_records(server)
+    assert server.errors > 0
+    assert sorted(os.listdir(str(tmp_path))) == ["cache", "icons", "pokedex.json"]
+
+
+def test_interrupted_downloads_resume_from_the_checkpoint(server, tmp_path, monkeypatch):
+    records = expected_records(server)
+    with open(str(tmp_path / "pokedex.json.partial"), "w") as f:
+        for number in range(1, 6):
+            f.write(json.dumps(records[number]) + "\n")
+        f.write(json.dumps(records[6])[:20])  # Torn by a crash
+
+    fetched = []
+    download_pokemon = get.download_pokemon
+    monkeypatch.setattr(get, "download_pokemon", lambda number, base_url: fetched.append(number)
+                        or download_pokemon(number, base_url))
+
+    assert download(server, tmp_path) == records
+    assert sorted(fetched) == list(range(6, COUNT + 1))
+    assert not os.path.exists(str(tmp_path / "pokedex.json.partial"))
@@ -0,0 +1,102 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import json
+
+from pokedex.database.index import CompiledIndex, compile_index, database_path, _chain_id
+
+
+def record(number, name, types, chain, **extra):
+    return dict({"id": number, "name": name, "types": types, "height": number, "weight": 10 * number,
+                 "genus": name.capitalize() + " Pokémon", "flavor_text": u"Flavor of %s.\nÉ" % name,
+                 "evolution_chain": "https://pokeapi.co/api/v2/evolution-chain/%d/" % chain}, **extra)
+
+
+def write_database(path, records):
+    with open(path, "w") as f:
+        json.dump({str(r["id"]): r for r in records}, f)
+
+
+def compiled(tmp_path, records):
+    source = str(tmp_path / "pokedex.json")
+    target = str(tmp_path / "pokedex.idx")
+    write_database(source, records)
+    compile_index(source, target)
+    return source, CompiledIndex(target)
+
+
+def decoded(index, number):
+    """A record as the index returns it, with the chain URL reduced to its id"""
+    found = index.get(number)
+    found["evolution_chain"] = _chain_id(found["evolution_chain"])
+    return found
+
+
+def test_bundled_database_round_trip(tmp_path):
+    target = str(tmp_path / "pokedex.idx")
+    compile_index(database_path, target)
+    index = CompiledIndex(target)
+    with open(database_path) as f:
+        records = {int(k): v for k, v in json.load(f).items()}
+
+    for number, expected in records.items():
+        assert decoded(index, number) == dict(expected, evolution_chain=_chain_id(expected["evolution_chain"]))
+        assert index.find(expected["name"].upper()) == number
+    assert [r["id"] for r in index.records()] == sorted(records)
+    assert index.is_fresh(database_path)
+    index.close()
+
+
+def test_parents_keep_known_base_and_unknown_apart(tmp_path):
+    records = [record(1, "bulbasaur", ["grass", "poison"], 1, evolves_from=None),
+               record(2, "ivysaur", ["grass", "poison"], 1, evolves_from=1),
+               record(3, "venusaur", ["grass", "poison"], 1)]
+    _, index = compiled(tmp_path, records)
+
+    assert index.get(1)["evolves_from"] is None
+    assert index.get(2)["evolves_from"] == 1
+    assert "evolves_from" not in index.get(3)
+    for expected in records:
+        assert decoded(index, expected["id"]) == dict(expected, evolution_chain=1)
+    graph_records = index.evolution_records()
+    assert sorted(graph_records) == [1, 2, 3]
+    for number, found in graph_records.items():
+        assert found == {key: index.get(number)[key] for key in found}
+    assert "evolves_from" not in graph_records[3]
+    index.close()
+
+
+def test_sparse_numbers_and_unknown_names(tmp_path):
+    _, index = compiled(tmp_path, [record(25, "pikachu", ["electric"], 10),
+                                   record(132, "ditto", ["normal"], 66)])
+
+    assert index.lookup("25")["name"] == "pikachu"
+    assert index.lookup("Ditto")["id"] == 132
+    assert index.get(26) is None
+    assert index.get(0) is None
+    assert index.get(index.slots) is None
+    assert index.lookup("missingno") is None
+    assert [r["id"] for r in index.records()] == [25, 132]
+    index.close()
+
+
+def test_unknown_types_are_left_out(tmp_path):
+    _, index = compiled(tmp_path, [record(1, "bulbasaur", ["shadow", "grass"], 1),
+                                   record(2, "ivysaur", ["shadow"], 1)])
+
+    assert index.get(1)["types"] == ["grass"]
+    assert index.get(2)["types"] == []
+    assert index.lookup("ivysaur")["id"] == 2
+    index.close()
+
+
+def test_changed_source_is_not_fresh(tmp_path):
+    source, index = compiled(tmp_path, [record(1, "bulbasaur", ["grass", "poison"], 1)])
+    assert index.is_fresh(source)
+
+    write_database(source, [record(1, "bulbasaur", ["grass", "poison"], 1),
+                            record(4, "charmander", ["fire"], 2)])
+    stat = os.stat(source)
+    os.utime(source, (stat.st_atime, stat.st_mtime + 1))
+    assert not index.is_fresh(source)
+    index.close()
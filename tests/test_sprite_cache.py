@@ -0,0 +1,42 @@
+# -*- encoding: utf-8 -*-
+
+import os
+import shutil
+
+import pytest
+
+from pokedex import resource_path
+from pokedex.graphics import sprite_cache
+from pokedex.graphics.sprite_cache import load_sprite, quantize_sprite, truecolor_sprite, cache_path
+
+
+@pytest.fixture
+def icon(tmp_path, monkeypatch):
+    """A bundled icon copied out of the icons directory, so the atlas never serves it"""
+    monkeypatch.setattr(sprite_cache, "SPRITE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(sprite_cache, "_loaded", {})
+    path = str(tmp_path / "icon025.png")
+    shutil.copy(os.path.join(resource_path, "icons", "icon025.png"), path)
+    return path
+
+
+@pytest.mark.parametrize("truecolor", [False, True])
+def test_warm_cache_reads_match_the_icon(icon, truecolor):
+    expected = truecolor_sprite(icon) if truecolor else quantize_sprite(icon)
+    assert load_sprite(icon, truecolor) == expected
+    assert os.path.exists(cache_path(icon, truecolor))
+
+    sprite_cache._loaded.clear()
+    assert sprite_cache._read(icon, os.stat(icon), truecolor) == expected
+    assert load_sprite(icon, truecolor) == expected
+    assert any(expected.top)  # Not the all-zero cells of a mangled cache
+
+
+def test_changed_icons_are_decoded_again(icon):
+    load_sprite(icon)
+    shutil.copy(os.path.join(resource_path, "icons", "icon001.png"), icon)
+    stat = os.stat(icon)
+    os.utime(icon, (stat.st_atime, stat.st_mtime + 1))
+
+    assert sprite_cache._read(icon, os.stat(icon)) is None
+    assert load_sprite(icon) == quantize_sprite(icon)
@@ -0,0 +1,51 @@
+# -*- encoding: utf-8 -*-
+
+import itertools
+
+from pokedex.database.type_chart import TYPES, CHART, QUARTERS, effectiveness, quarters, multipliers, weaknesses
+
+
+def chart_multiplier(attacker, defender):
+    double, half, zero = CHART[attacker]
+    if defender in zero:
+        return 0.0
+    return 2.0 if defender in double else 0.5 if defender in half else 1.0
+
+
+def combinations():
+    return [[t] for t in TYPES] + [list(pair) for pair in itertools.combinations(TYPES, 2)]
+
+
+def test_every_combination_matches_the_chart():
+    for types in combinations():
+        row = quarters(types)
+        assert len(row) == len(TYPES)
+        for attacker, q in zip(TYPES, row):
+            expected = 1.0
+            for defender in types:
+                expected *= chart_multiplier(attacker, defender)
+            assert QUARTERS[q] == expected
+            assert effectiveness(attacker, types) == expected
+
+
+def test_quarters_are_exact():
+    assert effectiveness("ice", ["dragon", "flying"]) == 4.0
+    assert effectiveness("fire", ["water", "rock"]) == 0.25
+    assert effectiveness("electric", ["water"]) == 2.0
+    assert effectiveness("ground", ["flying", "steel"]) == 0.0
+    assert sorted(set(q for types in combinations() for q in quarters(types))) == sorted(QUARTERS)
+
+
+def test_order_case_and_repeats():
+    assert quarters(["water", "ground"]) == quarters(["ground", "water"])
+    assert quarters(["Fire"]) == quarters(["fire", "fire"])
+    assert quarters([]) == bytes([4] * len(TYPES))
+    assert effectiveness("Fighting", ["Normal"]) == 2.0
+
+
+def test_weaknesses_strongest_first():
+    assert weaknesses(["water", "ground"]) == ["grass"]
+    assert weaknesses(["grass", "flying"])[0] == "ice"
+    assert weaknesses(["bug", "steel"]) == ["fire"]
+    assert multipliers(["ghost"])["normal"] == 0.0
+    assert multipliers(["ghost"])["ghost"] == 2.0